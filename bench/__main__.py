@@ -1,5 +1,32 @@
 from . import __version__
-from .utils.bench import benchmarks, datasets, tokenizers
+from .utils.adapter import adapters
+from .utils.bench import (
+    batch_sizes,
+    benchmarks_config,
+    chunk_sizes,
+    coldstart_dataset,
+    datasets,
+    decode_modes,
+    load_benchmarks,
+    preflight,
+    request_count,
+    request_sizes,
+    run_batch,
+    run_encode,
+    scaling_modes,
+    suites,
+    synthetic_datasets,
+)
+from .utils.coldstart import phases as coldstart_phases
+from .utils.coldstart import run_coldstart
+from .utils.corpus import format_size, parse_size, scaled_corpus
+from .utils.decode import run_decode
+from .utils.latency import run_latency
+from .utils.results import current_run_id
+from .utils.scaling import run_scaling
+from .utils.scheduler import Job, Scheduler, available_cpus, parse_cpus, pin_process
+from .utils.stream import run_stream
+from .utils.synthetic import synthetic_corpus, synthetic_label
 
 import argparse
 import functools
@@ -8,7 +35,7 @@ import logging
 import operator
 import os
 
-from multiprocessing import Process  # type: ignore
+from collections import OrderedDict
 from time import sleep
 
 from rich.console import Console
@@ -57,6 +84,12 @@ if __name__ == '__main__':
         help='Select datasets. Will run all if not specified.',
         type=str,
     )
+    argparser_general.add_argument(
+        '--config',
+        type=str,
+        help=f'Benchmark matrix of models and tokenizers. (default: "{benchmarks_config}")',
+        default=benchmarks_config,
+    )
     argparser_general.add_argument(
         '--timings-dir',
         '-o',
@@ -95,10 +128,114 @@ if __name__ == '__main__':
         help='Show results for previous benchmark runs and exit. (default: False)',
         default=False,
     )
+    argparser_general.add_argument(
+        '--list-runs',
+        action='store_true',
+        help='Show previous benchmark runs stored in the timings directory and exit. (default: False)',
+        default=False,
+    )
+    argparser_general.add_argument(
+        '--run',
+        type=str,
+        help='Run id to show results for. (default: latest result of each benchmark)',
+        default=None,
+    )
+    argparser_general.add_argument(
+        '--compare-run',
+        type=str,
+        help='Run id in the compare directory to compare to. (default: latest result of each benchmark)',
+        default=None,
+    )
+    argparser_general.add_argument(
+        '--history',
+        action='store_true',
+        help='Show all stored results of each benchmark with --show-results. (default: False)',
+        default=False,
+    )
     argparser.add_argument('--log-level', type=str, help='Log level. (default: INFO)', default='INFO')
     argparser.add_argument('--help', '-h', action='help', help='Show this help message and exit.')
 
     argparser_bench = argparser.add_argument_group('Benchmark options')
+    argparser_bench.add_argument(
+        '--suite',
+        '-s',
+        type=str,
+        choices=suites,
+        help='Benchmark suite to run. (default: encode)',
+        default='encode',
+    )
+    argparser_bench.add_argument(
+        '--synthetic',
+        action=argparse.BooleanOptionalAction,
+        help='Also run all synthetic datasets, which otherwise only run when selected. (default: False)',
+        default=False,
+    )
+    argparser_bench.add_argument(
+        '--synthetic-size',
+        type=str,
+        help='Size synthetic datasets are generated with, e.g. "64K" or "16M". (default: size of each dataset)',
+        default=None,
+    )
+    argparser_bench.add_argument(
+        '--synthetic-seed',
+        type=int,
+        help='Seed synthetic datasets are generated with. (default: seed of each dataset)',
+        default=None,
+    )
+    argparser_bench.add_argument(
+        '--batch-sizes',
+        action='extend',
+        nargs='+',
+        help=f'Batch sizes for the batch suite. (default: {",".join(str(x) for x in batch_sizes)})',
+        type=str,
+    )
+    argparser_bench.add_argument(
+        '--decode-modes',
+        action='extend',
+        nargs='+',
+        help=f'Decode kinds for the decode suite. (default: {",".join(decode_modes)})',
+        type=str,
+    )
+    argparser_bench.add_argument(
+        '--workers',
+        action='extend',
+        nargs='+',
+        help='Worker counts for the scaling suite, including 1. (default: powers of two up to the available cores)',
+        type=str,
+    )
+    argparser_bench.add_argument(
+        '--scaling-modes',
+        action='extend',
+        nargs='+',
+        help=f'Worker kinds for the scaling suite. (default: {",".join(scaling_modes)})',
+        type=str,
+    )
+    argparser_bench.add_argument(
+        '--stream-size',
+        type=str,
+        help='Size each dataset is scaled up to for the stream suite, e.g. "512M" or "4G". (default: 1G)',
+        default='1G',
+    )
+    argparser_bench.add_argument(
+        '--chunk-sizes',
+        action='extend',
+        nargs='+',
+        help=f'Chunk sizes for the stream suite. (default: {",".join(format_size(x) for x in chunk_sizes)})',
+        type=str,
+    )
+    argparser_bench.add_argument(
+        '--request-sizes',
+        type=str,
+        help='Range of characters per request for the latency suite, e.g. "50-5000". '
+        f'(default: {request_sizes[0]}-{request_sizes[1]})',
+        default=f'{request_sizes[0]}-{request_sizes[1]}',
+    )
+    argparser_bench.add_argument(
+        '--requests',
+        type=int,
+        help=f'Number of requests per iteration for the latency suite. (default: {request_count})',
+        default=request_count,
+    )
     argparser_bench.add_argument(
         '--skip-slow',
         action=argparse.BooleanOptionalAction,
@@ -140,7 +277,90 @@ if __name__ == '__main__':
         default=False,
     )
     argparser_bench.add_argument(
-        '--timeout', type=int, help='Timeout for each benchmark in seconds. (default: 1200)', default=1200
+        '--timeout',
+        type=int,
+        help='Timeout for each benchmark in seconds, unless set in the benchmark config. (default: 1200)',
+        default=1200,
+    )
+    argparser_bench.add_argument(
+        '--alpha',
+        type=float,
+        help='Significance level for comparisons and confidence intervals. (default: 0.05)',
+        default=0.05,
+    )
+    argparser_bench.add_argument(
+        '--test',
+        type=str,
+        choices=['mannwhitney', 'welch'],
+        help='Significance test for comparisons. (default: mannwhitney)',
+        default='mannwhitney',
+    )
+    argparser_bench.add_argument(
+        '--adaptive',
+        action=argparse.BooleanOptionalAction,
+        help='Choose warmup and iteration counts adaptively instead of using fixed counts. (default: False)',
+        default=False,
+    )
+    argparser_bench.add_argument(
+        '--target-time',
+        type=float,
+        help='Target time of each adaptive iteration in seconds. (default: 0.5)',
+        default=0.5,
+    )
+    argparser_bench.add_argument(
+        '--ci-threshold',
+        type=float,
+        help='Relative confidence interval half-width at which adaptive sampling stops. (default: 0.01)',
+        default=0.01,
+    )
+    argparser_bench.add_argument(
+        '--time-budget',
+        type=float,
+        help='Maximum time spent on each adaptive benchmark in seconds. (default: 300)',
+        default=300,
+    )
+    argparser_bench.add_argument(
+        '--max-warmup',
+        type=int,
+        help='Maximum number of adaptive warmup iterations. (default: 30)',
+        default=30,
+    )
+    argparser_bench.add_argument(
+        '--perf-counters',
+        action=argparse.BooleanOptionalAction,
+        help='Record hardware performance counters of each iteration if perf events are available. (default: False)',
+        default=False,
+    )
+    argparser_bench.add_argument(
+        '--profile',
+        action=argparse.BooleanOptionalAction,
+        help='Sample the timed iterations and write collapsed stacks instead of storing timings. (default: False)',
+        default=False,
+    )
+    argparser_bench.add_argument(
+        '--profile-dir',
+        type=str,
+        help='Directory to write profiles to. (default: profiles)',
+        default='profiles',
+    )
+    argparser_bench.add_argument(
+        '--jobs',
+        '-j',
+        type=int,
+        help='Number of benchmarks to run at the same time on disjoint, pinned cores. (default: 1)',
+        default=1,
+    )
+    argparser_bench.add_argument(
+        '--cpus',
+        type=str,
+        help='Cores to run benchmarks on, e.g. "2-7" or "2,4,6". Other cores are left to the runner. (default: all)',
+        default=None,
+    )
+    argparser_bench.add_argument(
+        '--cpus-per-job',
+        type=int,
+        help='Number of cores pinned to each benchmark. (default: available cores divided by jobs)',
+        default=None,
     )
 
     args = argparser.parse_args()
@@ -150,10 +370,9 @@ if __name__ == '__main__':
     # verify log level
     if args.log_level not in ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']:
         console.print(
-            f'[red]Invalid log level, must be one of[/] {"[dim], [/]".join(
-                [f"[bold]{x}[/]" for x in logging.getLevelNamesMapping()
-                 if x != "NOTSET"]
-            )}'
+            f'[red]Invalid log level, must be one of[/] {
+                "[dim], [/]".join([f"[bold]{x}[/]" for x in logging.getLevelNamesMapping() if x != "NOTSET"])
+            }'
         )
         exit(1)
 
@@ -164,6 +383,13 @@ if __name__ == '__main__':
         handlers=[RichHandler(rich_tracebacks=True)],
     )
 
+    # load benchmark config
+    try:
+        benchmarks = load_benchmarks(args.config)
+    except (OSError, ValueError) as e:
+        console.print(f'[red]Invalid benchmark config: [bold]{e}[/][/]')
+        exit(1)
+
     # list models
     if args.list_models:
         console.print('[dim]Available models:[/]')
@@ -174,7 +400,7 @@ if __name__ == '__main__':
     # list tokenizers
     if args.list_tokenizers:
         console.print('[dim]Available tokenizers:[/]')
-        for tokenizer in tokenizers:
+        for tokenizer in adapters():
             console.print(f'[blue]{tokenizer}[/]')
         exit(0)
 
@@ -183,6 +409,8 @@ if __name__ == '__main__':
         console.print('[dim]Available datasets:[/]')
         for dataset in datasets:
             console.print(f'[blue]{dataset}[/]')
+        for dataset, spec in synthetic_datasets.items():
+            console.print(f'[blue]{dataset}[/] [dim](synthetic, {format_size(spec["size"])})[/]')
         exit(0)
 
     # verify tokenizer args
@@ -191,9 +419,9 @@ if __name__ == '__main__':
             operator.add, ([s.strip() for s in t.split(',')] for t in args.tokenizers), []
         )
         for tok in args.tokenizers:
-            if tok not in tokenizers:
+            if tok not in adapters():
                 console.print(f'[red]Unknown tokenizer: [bold]{tok}[/][/]')
-                console.print(f'[dim]Available tokenizers:[/dim] {", ".join(f"[blue]{x}[/]" for x in tokenizers)}')
+                console.print(f'[dim]Available tokenizers:[/dim] {", ".join(f"[blue]{x}[/]" for x in adapters())}')
                 exit(1)
 
     # verify model args
@@ -209,19 +437,168 @@ if __name__ == '__main__':
     if args.datasets:
         args.datasets = functools.reduce(operator.add, ([s.strip() for s in t.split(',')] for t in args.datasets), [])
         for dataset in args.datasets:
-            if dataset not in datasets:
+            if dataset not in datasets and dataset not in synthetic_datasets:
                 console.print(f'[red]Unknown dataset: [bold]{dataset}[/][/]')
-                console.print(f'[dim]Available datasets:[/dim] {", ".join(f"[blue]{x}[/]" for x in datasets)}')
+                console.print(
+                    f'[dim]Available datasets:[/dim] {
+                        ", ".join(f"[blue]{x}[/]" for x in [*datasets, *synthetic_datasets])
+                    }'
+                )
                 exit(1)
 
-    def do_verify_imports() -> None:
-        from vendor.gpt_bpe import BPETokenizer  # type: ignore # noqa: F401
+    # verify synthetic dataset args
+    if args.synthetic_size is not None:
+        try:
+            args.synthetic_size = parse_size(args.synthetic_size)
+        except ValueError:
+            console.print(f'[red]Invalid synthetic dataset size: [bold]{args.synthetic_size}[/][/]')
+            exit(1)
+
+    # datasets to run by the name used in benchmark names, with the selectable dataset name, the file, and
+    # the generator arguments of synthetic datasets, which are only generated when they are run
+    run_datasets: OrderedDict[str, tuple[str, str | None, tuple[str, int, int] | None]] = OrderedDict(
+        (name, (name, file, None)) for name, file in datasets.items()
+    )
+    for name, spec in synthetic_datasets.items():
+        if args.synthetic or (args.datasets and name in args.datasets):
+            size = args.synthetic_size or spec['size']
+            seed = spec['seed'] if args.synthetic_seed is None else args.synthetic_seed
+            run_datasets[synthetic_label(name, size, seed)] = (name, None, (spec['generator'], size, seed))
+
+    # verify batch size args
+    if args.batch_sizes:
+        args.batch_sizes = functools.reduce(
+            operator.add, ([s.strip() for s in t.split(',')] for t in args.batch_sizes), []
+        )
+        for batch_size in args.batch_sizes:
+            if not batch_size.isdigit() or int(batch_size) < 1:
+                console.print(f'[red]Invalid batch size: [bold]{batch_size}[/][/]')
+                exit(1)
+        args.batch_sizes = [int(x) for x in args.batch_sizes]
+    else:
+        args.batch_sizes = batch_sizes
+
+    # verify decode mode args
+    if args.decode_modes:
+        args.decode_modes = functools.reduce(
+            operator.add, ([s.strip() for s in t.split(',')] for t in args.decode_modes), []
+        )
+        for mode in args.decode_modes:
+            if mode not in decode_modes:
+                console.print(f'[red]Unknown decode mode: [bold]{mode}[/][/]')
+                console.print(f'[dim]Available decode modes:[/dim] {", ".join(f"[blue]{x}[/]" for x in decode_modes)}')
+                exit(1)
+    else:
+        args.decode_modes = decode_modes
+
+    # verify worker args
+    if args.workers:
+        args.workers = functools.reduce(operator.add, ([s.strip() for s in t.split(',')] for t in args.workers), [])
+        for workers in args.workers:
+            if not workers.isdigit() or int(workers) < 1:
+                console.print(f'[red]Invalid worker count: [bold]{workers}[/][/]')
+                exit(1)
+        # speedups are relative to one worker, which is measured first
+        args.workers = sorted({int(x) for x in args.workers})
+        if args.workers[0] != 1:
+            console.print('[red]Worker counts must include [bold]1[/], the baseline of the speedup[/]')
+            exit(1)
+    else:
+        from .utils.scaling import worker_counts
+
+        args.workers = worker_counts()
+
+    # verify scaling mode args
+    if args.scaling_modes:
+        args.scaling_modes = functools.reduce(
+            operator.add, ([s.strip() for s in t.split(',')] for t in args.scaling_modes), []
+        )
+        for mode in args.scaling_modes:
+            if mode not in scaling_modes:
+                console.print(f'[red]Unknown scaling mode: [bold]{mode}[/][/]')
+                console.print(
+                    f'[dim]Available scaling modes:[/dim] {", ".join(f"[blue]{x}[/]" for x in scaling_modes)}'
+                )
+                exit(1)
+    else:
+        args.scaling_modes = scaling_modes
 
-        from kitoken import Kitoken  # type: ignore # noqa: F401
-        from llama_cpp import Llama, LlamaTokenizer  # type: ignore # noqa: F401
-        from sentencepiece import SentencePieceProcessor  # type: ignore # noqa: F401
-        from tiktoken.core import Encoding  # type: ignore # noqa: F401
-        from tokenizers import Tokenizer  # type: ignore # noqa: F401
+    # verify stream args
+    try:
+        args.stream_size = parse_size(args.stream_size)
+    except ValueError:
+        console.print(f'[red]Invalid stream size: [bold]{args.stream_size}[/][/]')
+        exit(1)
+    if args.chunk_sizes:
+        args.chunk_sizes = functools.reduce(
+            operator.add, ([s.strip() for s in t.split(',')] for t in args.chunk_sizes), []
+        )
+        for i, chunk_size in enumerate(args.chunk_sizes):
+            try:
+                args.chunk_sizes[i] = parse_size(chunk_size)
+            except ValueError:
+                console.print(f'[red]Invalid chunk size: [bold]{chunk_size}[/][/]')
+                exit(1)
+    else:
+        args.chunk_sizes = chunk_sizes
+
+    # verify latency args
+    try:
+        min_chars, max_chars = (int(x) for x in args.request_sizes.split('-'))
+        if not 0 < min_chars <= max_chars:
+            raise ValueError(args.request_sizes)
+        args.request_sizes = (min_chars, max_chars)
+    except ValueError:
+        console.print(f'[red]Invalid request sizes: [bold]{args.request_sizes}[/][/]')
+        exit(1)
+    if args.requests < 1:
+        console.print(f'[red]Invalid number of requests: [bold]{args.requests}[/][/]')
+        exit(1)
+
+    # verify alpha
+    if not 0 < args.alpha < 1:
+        console.print(f'[red]Invalid significance level: [bold]{args.alpha}[/][/]')
+        exit(1)
+
+    # verify adaptive args
+    if args.target_time <= 0 or args.ci_threshold <= 0 or args.time_budget <= 0 or args.max_warmup < 1:
+        console.print('[red]Invalid adaptive iteration settings[/]')
+        exit(1)
+    adaptive = (
+        {
+            'target_time': args.target_time,
+            'ci_threshold': args.ci_threshold,
+            'time_budget': args.time_budget,
+            'max_warmup': args.max_warmup,
+        }
+        if args.adaptive
+        else None
+    )
+    profile_dir = args.profile_dir if args.profile else None
+
+    # verify cpu args
+    if args.jobs < 1:
+        console.print(f'[red]Invalid number of jobs: [bold]{args.jobs}[/][/]')
+        exit(1)
+    if args.cpus:
+        try:
+            args.cpus = parse_cpus(args.cpus)
+        except ValueError:
+            console.print(f'[red]Invalid cpu list: [bold]{args.cpus}[/][/]')
+            exit(1)
+        unavailable = set(args.cpus) - set(available_cpus())
+        if len(unavailable) > 0:
+            console.print(f'[red]Unavailable cpus: [bold]{", ".join(str(x) for x in sorted(unavailable))}[/][/]')
+            exit(1)
+    if (args.cpus_per_job or 1) * args.jobs > len(args.cpus or available_cpus()):
+        console.print(f'[red]Not enough cpus for {args.jobs} jobs with {args.cpus_per_job or 1} cpus each[/]')
+        exit(1)
+
+    def do_verify_imports() -> None:
+        for tok, adapter in adapters().items():
+            if args.tokenizers and tok not in args.tokenizers:
+                continue
+            adapter().import_modules()
 
     if args.verify_imports:
         do_verify_imports()
@@ -230,9 +607,42 @@ if __name__ == '__main__':
     gc.freeze()
     gc.disable()
 
+    if args.list_runs:
+        from .utils.results import ResultsStore
+
+        console.print('[dim]Stored runs:[/]')
+        for run in ResultsStore(args.timings_dir).runs():
+            console.print(
+                f'[blue]{run["run_id"]}[/] [dim]{run["started"]}[/] {run["results"]} results '
+                f'[dim]commit:[/] {(run["git_commit"] or "-")[:10]} [dim]cpu:[/] {run["cpu_model"]}'
+            )
+        exit(0)
+
     if args.show_results:
         console.print('[bold]Showing results...[/]')
-        from .utils.timer import Timings
+        from .utils.results import ResultsStore
+        from .utils.timer import Timings, configure
+
+        configure(alpha=args.alpha, test=args.test)
+
+        def show_results(run_names: list[str]) -> None:
+            for run_name in run_names:
+                console.print(f'[blue bold]{run_name}[/]')
+                if args.history:
+                    for record in ResultsStore(args.timings_dir).history(run_name):
+                        console.print(
+                            f'\t[dim]{record["recorded"]} {record["run_id"]}[/] '
+                            f'[dim]avg:[/] {record["avg"]:.5f}s [dim]med:[/] {record["med"]:.5f}s '
+                            f'[dim]std:[/] {record["std"]:.5f}s [dim]n:[/] {record["iterations"]} '
+                            f'[dim]version:[/] {record["library_version"] or "-"} '
+                            f'[dim]commit:[/] {(record["git_commit"] or "-")[:10]}'
+                        )
+                timings = Timings.from_dir(run_name, args.timings_dir, args.run)
+                timings.print_timings()
+                if args.compare_dir or args.compare_run:
+                    compare = Timings.from_dir(run_name, args.compare_dir or args.timings_dir, args.compare_run)
+                    compare.name = args.compare_run or os.path.basename(args.compare_dir)
+                    timings.print_timings_compare(compare)
 
         for model, tokenizer in benchmarks.items():
             if args.models and model not in args.models:
@@ -240,19 +650,43 @@ if __name__ == '__main__':
             for tok, _ in tokenizer.items():
                 if args.tokenizers and tok not in args.tokenizers:
                     continue
-                for name, _ in datasets.items():
-                    if args.datasets and name not in args.datasets:
+                if args.suite == 'coldstart':
+                    show_results([f'{tok} - {model} - cold start - {phase}' for phase in coldstart_phases])
+                    continue
+                for name, (dataset, _, _) in run_datasets.items():
+                    if args.datasets and dataset not in args.datasets:
                         continue
-                    console.print(f'[blue bold]{tok} - {model} - {name}[/]')
-                    timings = Timings.from_dir(f'{tok} - {model} - {name}', args.timings_dir)
-                    timings.print_timings()
-                    if args.compare_dir:
-                        compare = Timings.from_dir(f'{tok} - {model} - {name}', args.compare_dir)
-                        compare.name = os.path.basename(args.compare_dir)
-                        timings.print_timings_compare(compare)
+                    if args.suite == 'batch':
+                        run_names = [
+                            f'{tok} - {model} - {name} - batch {batch_size}' for batch_size in args.batch_sizes
+                        ]
+                    elif args.suite == 'decode':
+                        run_names = [f'{tok} - {model} - {name} - decode {mode}' for mode in args.decode_modes]
+                    elif args.suite == 'scaling':
+                        run_names = [
+                            f'{tok} - {model} - {name} - {mode} {workers}'
+                            for mode in args.scaling_modes
+                            for workers in args.workers
+                        ]
+                    elif args.suite == 'stream':
+                        run_names = [
+                            f'{tok} - {model} - {name} - stream {format_size(args.stream_size)} '
+                            f'chunk {format_size(chunk_size)}'
+                            for chunk_size in args.chunk_sizes
+                        ]
+                    elif args.suite == 'latency':
+                        run_names = [
+                            f'{tok} - {model} - {name} - latency {args.request_sizes[0]}-{args.request_sizes[1]}'
+                        ]
+                    else:
+                        run_names = [f'{tok} - {model} - {name}']
+                    show_results(run_names)
         exit(0)
 
-    console.print('[bold]Running benchmarks...[/]')
+    console.print(f'[bold]Running benchmarks...[/] [dim](run {current_run_id()})[/]')
+    jobs: list[Job] = []
+    corpora: dict[str, str] = {}
+    skipped = 0
     try:
         for model, tokenizer in benchmarks.items():
             if args.models and model not in args.models:
@@ -260,98 +694,176 @@ if __name__ == '__main__':
                 continue
             for tok, params in tokenizer.items():
                 if args.tokenizers and tok not in args.tokenizers:
-                    logger.info(
-                        f'Skipping unselected tokenizer: {
-                                model} - {tok}'
-                    )
+                    logger.info(f'Skipping unselected tokenizer: {model} - {tok}')
+                    continue
+                # configurations that can't run are skipped before any benchmark starts
+                problem = preflight(tok, params)
+                if problem is not None:
+                    logger.warning(f'Skipping {model} - {tok}: {problem}')
+                    skipped += 1
                     continue
-                for name, file in datasets.items():
-                    if args.datasets and name not in args.datasets:
-                        logger.info(
-                            f'Skipping unselected dataset: {
-                                    model} - {tok} - {name}'
+                if args.suite == 'coldstart':
+                    run_name = f'{tok} - {model} - cold start'
+                    jobs.append(
+                        (
+                            run_name,
+                            run_coldstart,
+                            (
+                                args.timings_dir,
+                                args.compare_dir,
+                                run_name,
+                                str(params['model']),
+                                datasets[coldstart_dataset],
+                                params['iterations'].get(args.suite, 20),
+                                params['warmup'].get(args.suite, 2),
+                                tok,
+                            ),
+                            params['timeout'],
                         )
+                    )
+                    continue
+                for name, (dataset, source, synthetic) in run_datasets.items():
+                    if args.datasets and dataset not in args.datasets:
+                        logger.info(f'Skipping unselected dataset: {model} - {tok} - {name}')
                         continue
-                    if args.skip_slow and name in params['slow']:
-                        logger.info(
-                            f'Skipping slow benchmark: {
-                                    model} - {tok} - {name}'
-                        )
+                    if args.skip_slow and dataset in params['slow']:
+                        logger.info(f'Skipping slow benchmark: {model} - {tok} - {name}')
                         continue
-                    if args.only_slow and name not in params['slow']:
-                        logger.info(
-                            f'Skipping non-slow benchmark: {
-                                    model} - {tok} - {name}'
-                        )
+                    if args.only_slow and dataset not in params['slow']:
+                        logger.info(f'Skipping non-slow benchmark: {model} - {tok} - {name}')
                         continue
-                    if not args.allow_inf and name in params['inf']:
-                        logger.info(
-                            f'Skipping infinite benchmark: {
-                                    model} - {tok} - {name}'
-                        )
+                    if not args.allow_inf and dataset in params['inf']:
+                        logger.info(f'Skipping infinite benchmark: {model} - {tok} - {name}')
                         continue
-                    p: Process | None = None
-                    try:
-                        if tok not in tokenizers:
-                            logger.error(f'Unknown tokenizer: {tok}')
-                            continue
-                        fn = tokenizers[tok]
-                        if not args.multiprocessing:
-                            fn(
-                                args.timings_dir,
-                                args.compare_dir,
-                                f'{tok} - {model} - {name}',
-                                str(params['model']),
-                                file,
+                    if synthetic is not None and name not in corpora:
+                        logger.info(f'Generating synthetic dataset: {name}')
+                        corpora[name] = synthetic_corpus(*synthetic)
+                    file = source or corpora[name]
+                    path = file
+                    if args.suite == 'batch':
+                        runs = [
+                            (
+                                f'{tok} - {model} - {name} - batch {batch_size}',
+                                run_batch,
                                 100,
                                 15,
+                                (batch_size,),
                             )
-                        else:
-                            p = Process(
-                                target=fn,
-                                args=(
-                                    args.timings_dir,
-                                    args.compare_dir,
-                                    f'{tok} - {model} - {name}',
-                                    str(params['model']),
-                                    file,
-                                    100,
-                                    15,
-                                ),
+                            for batch_size in args.batch_sizes
+                        ]
+                    elif args.suite == 'decode':
+                        if not adapters()[tok].supports_decode:
+                            logger.info(f'Skipping tokenizer without decoding: {model} - {tok}')
+                            continue
+                        runs = [(f'{tok} - {model} - {name}', run_decode, 20, 3, (args.decode_modes,))]
+                    elif args.suite == 'scaling':
+                        runs = [
+                            (
+                                f'{tok} - {model} - {name}',
+                                run_scaling,
+                                20,
+                                5,
+                                (args.workers, args.scaling_modes),
                             )
-                            p.start()
-                            result = p.join(timeout=args.timeout)
-                            if result is None and p.exitcode is None:
-                                print()
-                                logger.error(
-                                    f'Timeout for {
-                                    model} - {tok} - {name} after {args.timeout}s'
-                                )
-                                p.terminate()
-                                while p.is_alive():
-                                    sleep(0.1)
-                            elif result is None and p.exitcode is not None and p.exitcode != 0:
-                                logger.error(f'{model} - {tok} - {name} exited with code {p.exitcode}')
-                                p.close()
-                    except KeyboardInterrupt as e:
-                        print()
-                        if p:
-                            p.join(timeout=2)
-                            p.terminate()
-                            p.close()
+                        ]
+                    elif args.suite == 'stream':
+                        if file not in corpora:
+                            logger.info(f'Generating {format_size(args.stream_size)} corpus from {file}')
+                            corpora[file] = scaled_corpus(file, args.stream_size)
+                        path = corpora[file]
+                        runs = [
+                            (
+                                f'{tok} - {model} - {name} - stream {format_size(args.stream_size)} '
+                                f'chunk {format_size(chunk_size)}',
+                                run_stream,
+                                5,
+                                1,
+                                (chunk_size,),
+                            )
+                            for chunk_size in args.chunk_sizes
+                        ]
+                    elif args.suite == 'latency':
+                        runs = [
+                            (
+                                f'{tok} - {model} - {name} - latency {args.request_sizes[0]}-{args.request_sizes[1]}',
+                                run_latency,
+                                20,
+                                3,
+                                (*args.request_sizes, args.requests),
+                            )
+                        ]
+                    else:
+                        runs = [(f'{tok} - {model} - {name}', run_encode, 100, 15, ())]
+                    jobs.extend(
+                        (
+                            run_name,
+                            fn,
+                            (
+                                args.timings_dir,
+                                args.compare_dir,
+                                run_name,
+                                str(params['model']),
+                                path,
+                                params['iterations'].get(args.suite, iters),
+                                params['warmup'].get(args.suite, warmup),
+                                tok,
+                                *extra_args,
+                            ),
+                            params['timeout'],
+                        )
+                        for run_name, fn, iters, warmup, extra_args in runs
+                    )
+        if skipped > 0:
+            logger.warning(f'Skipped {skipped} configurations that can not run')
+        if not args.multiprocessing:
+            from .utils.timer import configure
+
+            configure(
+                alpha=args.alpha,
+                test=args.test,
+                adaptive=adaptive,
+                perf_counters=args.perf_counters,
+                profile_dir=profile_dir,
+            )
+            for _, fn, fn_args, _ in jobs:
+                try:
+                    fn(*fn_args)
+                except KeyboardInterrupt as e:
+                    print()
+                    raise e
+                except Exception as e:
+                    if args.exit_on_error:
                         raise e
-                    except Exception as e:
-                        if args.exit_on_error:
-                            raise e
+                    else:
+                        if args.error_trace:
+                            logger.exception(e)
                         else:
-                            if args.error_trace:
-                                logger.exception(e)
-                            else:
-                                logger.error(e)
-                            continue
-                    finally:
-                        gc.collect()
-                        sleep(0.1)
+                            logger.error(e)
+                        continue
+                finally:
+                    gc.collect()
+                    sleep(0.1)
+        else:
+            if args.cpus:
+                reserved = set(available_cpus()) - set(args.cpus)
+                if len(reserved) > 0:
+                    pin_process(sorted(reserved))
+            scheduler = Scheduler(
+                concurrency=args.jobs,
+                cpus=args.cpus,
+                cpus_per_job=args.cpus_per_job,
+                timeout=args.timeout,
+                exit_on_error=args.exit_on_error,
+                error_trace=args.error_trace,
+                settings={
+                    'alpha': args.alpha,
+                    'test': args.test,
+                    'adaptive': adaptive,
+                    'perf_counters': args.perf_counters,
+                    'profile_dir': profile_dir,
+                },
+            )
+            scheduler.run(jobs)
     except KeyboardInterrupt:
         logger.info('Interrupted')
         exit(0)
@@ -1,15 +1,38 @@
-from ..utils.bench import bench
+from ..utils.adapter import Adapter
 
+import itertools
+import os
+import platform
+import sys
 
-@bench()
-def run(timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int) -> None:
-    from vendor.gpt_bpe import BPETokenizer
+from collections.abc import Sequence
+from typing import Any
 
-    from ..utils.timer import BenchmarkTimer
 
-    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
-        encoder: BPETokenizer = BPETokenizer(model)
-        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
-            with timing_iteration:
-                for _ in range(10):
-                    encoder.encode(text)
+class GptBpeAdapter(Adapter):
+    name = 'gpt_bpe'
+    imports = ('vendor.gpt_bpe',)
+    encoder: Any
+
+    def load(self: 'GptBpeAdapter', model: str) -> None:
+        from vendor.gpt_bpe import BPETokenizer
+
+        self.encoder = BPETokenizer(model)
+
+    def check(self: 'GptBpeAdapter', model: str) -> str | None:
+        # the native library is loaded when importing the wrapper and is not part of the repository
+        library = f'vendor/gpt_bpe_{sys.platform.lower()}_{platform.machine().lower()}.dylib'
+        if not os.path.isfile(library):
+            return f'native library {library} not found'
+        return None
+
+    def encode(self: 'GptBpeAdapter', text: str) -> Sequence[int]:
+        return self.encoder.encode(text)
+
+    def encode_batch(self: 'GptBpeAdapter', texts: list[str]) -> list[Sequence[int]]:
+        # one contiguous array for the batch, the native buffers are freed while encoding
+        tokens, offsets = self.encoder.encode_batch(texts)
+        return [tokens[start:end] for start, end in itertools.pairwise(offsets.tolist())]
+
+    def decode(self: 'GptBpeAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.decode(ids).decode('utf-8', errors='replace')
@@ -0,0 +1,42 @@
+from ..utils.adapter import Adapter
+
+import glob
+
+from collections.abc import Sequence
+from typing import Any
+
+
+class KimiAdapter(Adapter):
+    name = 'kimi'
+    # the wrapper encodes and decodes with tiktoken
+    library = 'tiktoken'
+    imports = ('vendor.kimi',)
+    encoder: Any
+
+    def load(self: 'KimiAdapter', model: str) -> None:
+        from vendor.kimi import TikTokenTokenizer
+
+        self.encoder = TikTokenTokenizer(model)
+        self.encoder.encode_special_tokens = False
+
+    def encode(self: 'KimiAdapter', text: str) -> Sequence[int]:
+        # keyword arguments of the transformers api make the wrapper fall back to the slow transformers path
+        return self.encoder.encode(text, allow_special_tokens=False)
+
+    def decode(self: 'KimiAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.decode(ids)
+
+    def test_models(self: 'KimiAdapter') -> list[str]:
+        return sorted(glob.glob('models/tests/*.kimi'))
+
+
+class KimiParallelAdapter(KimiAdapter):
+    # encodes chunks of long texts on a thread pool, test outputs are generated to compare with the serial path
+    name = 'kimi_parallel'
+
+    def load(self: 'KimiParallelAdapter', model: str) -> None:
+        from ..utils.scheduler import available_cpus
+
+        super().load(model)
+        # one thread per core the benchmark is pinned to
+        self.encoder.encode_workers = len(available_cpus())
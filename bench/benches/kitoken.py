@@ -1,15 +1,37 @@
-from ..utils.bench import bench
+from ..utils.adapter import Adapter
 
+import glob
+import os
 
-@bench()
-def run(timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int) -> None:
-    from ..utils.timer import BenchmarkTimer
+from collections.abc import Sequence
+from typing import Any
 
-    from kitoken import Kitoken
 
-    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
-        encoder: Kitoken = Kitoken.from_file(model)
-        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
-            with timing_iteration:
-                for _ in range(10):
-                    encoder.encode(text, True)
+class KitokenAdapter(Adapter):
+    name = 'kitoken'
+    library = 'kitoken'
+    imports = ('kitoken',)
+    supports_batch = True
+    encoder: Any
+
+    def load(self: 'KitokenAdapter', model: str) -> None:
+        from kitoken import Kitoken
+
+        self.encoder = Kitoken.from_file(model)
+
+    def encode(self: 'KitokenAdapter', text: str) -> Sequence[int]:
+        return self.encoder.encode(text, True)
+
+    def encode_batch(self: 'KitokenAdapter', texts: list[str]) -> list[Sequence[int]]:
+        return self.encoder.encode_all(texts, True)
+
+    def decode(self: 'KitokenAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.decode(ids, True).decode('utf-8', errors='replace')
+
+    def test_models(self: 'KitokenAdapter') -> list[str]:
+        # kitoken reads every format, so each model is generated once to compare with the other libraries
+        models: dict[str, str] = {}
+        for extension in ['model', 'json', 'tiktoken']:
+            for model in sorted(glob.glob(f'models/tests/*.{extension}')):
+                models.setdefault(os.path.basename(model).split('.')[0], model)
+        return sorted(models.values())
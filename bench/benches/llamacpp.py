@@ -1,16 +1,24 @@
-from ..utils.bench import bench
+from ..utils.adapter import Adapter
 
+from collections.abc import Sequence
+from typing import Any
 
-@bench()
-def run(timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int) -> None:
-    from ..utils.timer import BenchmarkTimer
 
-    from llama_cpp import Llama, LlamaTokenizer
+class LlamaCppAdapter(Adapter):
+    name = 'llamacpp'
+    library = 'llama-cpp-python'
+    imports = ('llama_cpp',)
+    llama: Any
+    encoder: Any
 
-    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
-        llama = Llama(model, vocab_only=True)
-        encoder: LlamaTokenizer = LlamaTokenizer(llama)
-        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
-            with timing_iteration:
-                for _ in range(10):
-                    encoder.encode(text)
+    def load(self: 'LlamaCppAdapter', model: str) -> None:
+        from llama_cpp import Llama, LlamaTokenizer
+
+        self.llama = Llama(model, vocab_only=True)
+        self.encoder = LlamaTokenizer(self.llama)
+
+    def encode(self: 'LlamaCppAdapter', text: str) -> Sequence[int]:
+        return self.encoder.encode(text)
+
+    def decode(self: 'LlamaCppAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.decode(ids)
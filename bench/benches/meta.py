@@ -1,17 +1,28 @@
-from ..utils.bench import bench
+from ..utils.adapter import Adapter
 
+import glob
+
+from collections.abc import Sequence
 from pathlib import Path
+from typing import Any
+
+
+class MetaAdapter(Adapter):
+    name = 'meta'
+    library = 'llama-models'
+    imports = ('llama_models.llama4.tokenizer',)
+    encoder: Any
+
+    def load(self: 'MetaAdapter', model: str) -> None:
+        from llama_models.llama4.tokenizer import Tokenizer
 
+        self.encoder = Tokenizer(Path(model))
 
-@bench()
-def run(timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int) -> None:
-    from ..utils.timer import BenchmarkTimer
+    def encode(self: 'MetaAdapter', text: str) -> Sequence[int]:
+        return self.encoder.encode(text, eos=False, bos=False, allowed_special='all')
 
-    from llama_models.llama4.tokenizer import Tokenizer
+    def decode(self: 'MetaAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.decode(ids)
 
-    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
-        encoder = Tokenizer(Path(model))
-        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
-            with timing_iteration:
-                for _ in range(10):
-                    encoder.encode(text, eos=False, bos=False, allowed_special='all')
+    def test_models(self: 'MetaAdapter') -> list[str]:
+        return sorted(glob.glob('models/tests/*.meta'))
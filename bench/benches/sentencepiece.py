@@ -1,16 +1,32 @@
-from ..utils.bench import bench
+from ..utils.adapter import Adapter
 
+import glob
 
-@bench()
-def run(timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int) -> None:
-    from ..utils.timer import BenchmarkTimer
+from collections.abc import Sequence
+from typing import Any
 
-    from sentencepiece import SentencePieceProcessor
 
-    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
-        encoder: SentencePieceProcessor = SentencePieceProcessor()
-        encoder.Load(model)
-        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
-            with timing_iteration:
-                for _ in range(10):
-                    encoder.EncodeAsIds(text)
+class SentencePieceAdapter(Adapter):
+    name = 'sentencepiece'
+    library = 'sentencepiece'
+    imports = ('sentencepiece',)
+    supports_batch = True
+    encoder: Any
+
+    def load(self: 'SentencePieceAdapter', model: str) -> None:
+        from sentencepiece import SentencePieceProcessor
+
+        self.encoder = SentencePieceProcessor()
+        self.encoder.Load(model)
+
+    def encode(self: 'SentencePieceAdapter', text: str) -> Sequence[int]:
+        return self.encoder.EncodeAsIds(text)
+
+    def encode_batch(self: 'SentencePieceAdapter', texts: list[str]) -> list[Sequence[int]]:
+        return self.encoder.EncodeAsIds(texts)
+
+    def decode(self: 'SentencePieceAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.Decode(ids)
+
+    def test_models(self: 'SentencePieceAdapter') -> list[str]:
+        return sorted(glob.glob('models/tests/*.model'))
@@ -1,16 +1,46 @@
-from ..utils.bench import bench
+from ..utils.adapter import Adapter
 
+import builtins
+import glob
 
-@bench()
-def run(timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int) -> None:
-    from ..utils.timer import BenchmarkTimer
+from collections.abc import Sequence
+from typing import Any
 
-    from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
 
-    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
-        encoder = MistralTokenizer.from_file(model)
-        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
-            with timing_iteration:
-                for _ in range(10):
-                    encoder.instruct_tokenizer.tokenizer.encode(
-                        text, True, True)
+class TekkenAdapter(Adapter):
+    name = 'tekken'
+    library = 'mistral-common'
+    imports = ('mistral_common.tokens.tokenizers.mistral',)
+    encoder: Any
+    tokenizer: Any
+
+    def load(self: 'TekkenAdapter', model: str) -> None:
+        from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
+
+        # workaround for github.com/mistralai/mistral-common/pull/33
+        open_ = builtins.open
+        builtins.open = lambda *args, **kwargs: open_(
+            *args, **{k: v for k, v in kwargs.items() if k != 'encoding'}, encoding='utf-8'
+        )
+        try:
+            self.encoder = MistralTokenizer.from_file(model)
+        finally:
+            builtins.open = open_
+        self.tokenizer = self.encoder.instruct_tokenizer.tokenizer
+
+    def encode(self: 'TekkenAdapter', text: str) -> Sequence[int]:
+        return self.tokenizer.encode(text, True, True)
+
+    def encode_ids(self: 'TekkenAdapter', text: str) -> Sequence[int]:
+        return self.tokenizer.encode(text, False, False)
+
+    def decode(self: 'TekkenAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.decode(ids)
+
+    def test_models(self: 'TekkenAdapter') -> list[str]:
+        models = []
+        for model in sorted(glob.glob('models/tests/*.json')):
+            with open(model, encoding='utf-8') as f:
+                if f.read().find('"version": "v3"') != -1:
+                    models.append(model)
+        return models
@@ -1,15 +1,38 @@
-from ..utils.bench import bench
+from ..utils.adapter import Adapter
 
+import glob
+import os
 
-@bench()
-def run(timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int) -> None:
-    from ..utils.timer import BenchmarkTimer
+from collections.abc import Sequence
+from typing import Any
 
-    from tiktoken import Encoding, get_encoding
 
-    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
-        encoder: Encoding = get_encoding(model)
-        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
-            with timing_iteration:
-                for _ in range(10):
-                    encoder.encode(text, allowed_special='all')
+class TiktokenAdapter(Adapter):
+    name = 'tiktoken'
+    library = 'tiktoken'
+    imports = ('tiktoken',)
+    supports_batch = True
+    encoder: Any
+
+    def load(self: 'TiktokenAdapter', model: str) -> None:
+        from tiktoken import get_encoding
+
+        self.encoder = get_encoding(model)
+
+    def encode(self: 'TiktokenAdapter', text: str) -> Sequence[int]:
+        return self.encoder.encode(text, allowed_special='all')
+
+    def encode_batch(self: 'TiktokenAdapter', texts: list[str]) -> list[Sequence[int]]:
+        return self.encoder.encode_batch(texts, allowed_special='all')
+
+    def decode(self: 'TiktokenAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.decode(ids)
+
+    def model_file(self: 'TiktokenAdapter', model: str) -> str | None:
+        # encodings are loaded by name, the test models are the files they are named after
+        path = f'models/tests/{model}.tiktoken'
+        return path if os.path.isfile(path) else None
+
+    def test_models(self: 'TiktokenAdapter') -> list[str]:
+        # tiktoken loads encodings by name
+        return [os.path.basename(model).split('.')[0] for model in sorted(glob.glob('models/tests/*.tiktoken'))]
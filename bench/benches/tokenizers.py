@@ -1,16 +1,42 @@
-from ..utils.bench import bench
+from ..utils.adapter import Adapter
 
+import glob
 
-@bench()
-def run(timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int) -> None:
-    from ..utils.timer import BenchmarkTimer
+from collections.abc import Sequence
+from typing import Any
 
-    from tokenizers import Tokenizer
 
-    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
-        encoder: Tokenizer = Tokenizer.from_file(model)
-        encoder.encode_special_tokens = False  # type: ignore
-        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
-            with timing_iteration:
-                for _ in range(10):
-                    encoder.encode(text, add_special_tokens=False)
+class TokenizersAdapter(Adapter):
+    name = 'tokenizers'
+    library = 'tokenizers'
+    imports = ('tokenizers',)
+    supports_batch = True
+    encoder: Any
+
+    def load(self: 'TokenizersAdapter', model: str) -> None:
+        from tokenizers import Tokenizer
+
+        self.encoder = Tokenizer.from_file(model)
+        self.encoder.encode_special_tokens = False
+
+    def encode(self: 'TokenizersAdapter', text: str) -> Any:
+        # the Encoding is returned as is, reading its ids copies them into a list
+        return self.encoder.encode(text, add_special_tokens=False)
+
+    def encode_ids(self: 'TokenizersAdapter', text: str) -> Sequence[int]:
+        return self.encoder.encode(text, add_special_tokens=False).ids
+
+    def encode_batch(self: 'TokenizersAdapter', texts: list[str]) -> list[Any]:
+        return self.encoder.encode_batch(texts, add_special_tokens=False)
+
+    def decode(self: 'TokenizersAdapter', ids: Sequence[int]) -> str:
+        return self.encoder.decode(ids, skip_special_tokens=False)
+
+    def test_models(self: 'TokenizersAdapter') -> list[str]:
+        # tekken models are generated with the tekken adapter
+        models = []
+        for model in sorted(glob.glob('models/tests/*.json')):
+            with open(model, encoding='utf-8') as f:
+                if f.read().find('"version": "v3"') == -1:
+                    models.append(model)
+        return models
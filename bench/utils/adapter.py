@@ -0,0 +1,91 @@
+import abc
+import functools
+import importlib
+import os
+import pkgutil
+
+from collections import OrderedDict
+from collections.abc import Sequence
+from importlib.metadata import entry_points
+
+
+ENTRY_POINT_GROUP = 'tokenizer_bench.adapters'
+
+
+class Adapter(abc.ABC):
+    # name used to select the tokenizer and in benchmark names
+    name: str = ''
+    # distribution name used to report the library version
+    library: str | None = None
+    # modules imported when loading a model, measured by the cold start suite
+    imports: tuple[str, ...] = ()
+    # whether encode_batch uses a native batch entry point instead of encoding texts one by one
+    supports_batch: bool = False
+    supports_decode: bool = True
+
+    def import_modules(self: 'Adapter') -> None:
+        for module in self.imports:
+            importlib.import_module(module)
+
+    @abc.abstractmethod
+    def load(self: 'Adapter', model: str) -> None: ...
+
+    # the call that is benchmarked, the result only needs to support len() for counting tokens
+    @abc.abstractmethod
+    def encode(self: 'Adapter', text: str) -> Sequence[int]: ...
+
+    def encode_ids(self: 'Adapter', text: str) -> Sequence[int]:
+        # token ids without special tokens, used for test outputs and as input of the decode suite
+        return self.encode(text)
+
+    def encode_batch(self: 'Adapter', texts: list[str]) -> list[Sequence[int]]:
+        return [self.encode(text) for text in texts]
+
+    @abc.abstractmethod
+    def decode(self: 'Adapter', ids: Sequence[int]) -> str: ...
+
+    def check(self: 'Adapter', model: str) -> str | None:
+        # returns why the model can't be loaded if that is known without loading it, model names resolved by
+        # the library itself are not checked
+        if '/' in model and not os.path.isfile(model):
+            return f'model {model} not found'
+        return None
+
+    def model_file(self: 'Adapter', model: str) -> str | None:
+        # file or directory the model is loaded from, used to detect changed models, None for models that are
+        # only known by name
+        return model if os.path.exists(model) else None
+
+    def test_models(self: 'Adapter') -> list[str]:
+        # models in models/tests to generate test outputs for
+        return []
+
+
+@functools.cache
+def adapters() -> OrderedDict[str, type[Adapter]]:
+    # benches is a namespace package without an __init__ module
+    benches = importlib.import_module('..benches', __package__)
+
+    found: OrderedDict[str, type[Adapter]] = OrderedDict()
+    for module_info in pkgutil.iter_modules(benches.__path__):
+        module = importlib.import_module(f'{benches.__name__}.{module_info.name}')
+        for value in vars(module).values():
+            if (
+                isinstance(value, type)
+                and issubclass(value, Adapter)
+                and value.__module__ == module.__name__
+                and value.name
+            ):
+                found[value.name] = value
+    # adapters of other packages registered as entry points
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        adapter = entry_point.load()
+        found[adapter.name] = adapter
+    return found
+
+
+def get_adapter(name: str) -> Adapter:
+    # the library is imported up front so loading a model only measures the model
+    adapter = adapters()[name]()
+    adapter.import_modules()
+    return adapter
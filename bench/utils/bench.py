@@ -2,7 +2,7 @@ import gc
 
 from collections import OrderedDict
 from collections.abc import Callable
-from typing import Any
+from typing import Any, TypedDict
 
 
 def set_high_priority() -> None:
@@ -29,6 +29,23 @@ def set_high_priority() -> None:
         os.nice(-10)  # type: ignore
 
 
+def split_documents(text: str, max_chars: int = 4096) -> list[str]:
+    documents: list[str] = []
+    for paragraph in text.split('\n'):
+        if len(paragraph.strip()) == 0:
+            continue
+        documents.extend(paragraph[i : i + max_chars] for i in range(0, len(paragraph), max_chars))
+    return documents
+
+
+def text_work(texts: list[str], tokens: int, repeat: int = 1) -> dict[str, float]:
+    return {
+        'bytes': sum(len(text.encode('utf-8')) for text in texts) * repeat,
+        'chars': sum(len(text) for text in texts) * repeat,
+        'tokens': tokens * repeat,
+    }
+
+
 BenchFunc = Callable[..., Any]
 
 
@@ -53,76 +70,53 @@ def bench() -> Callable[..., BenchFunc]:
     return decorator
 
 
-def run_bench_kitoken(
-    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int
-) -> None:
-    from ..benches.kitoken import run
-
-    text = open(text, encoding='utf-8', newline='\n').read()
-    run(timings, compare, name, model, text, iters, warmup)
-
-
-def run_bench_tiktoken(
-    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int
-) -> None:
-    from ..benches.tiktoken import run
-
-    text = open(text, encoding='utf-8', newline='\n').read()
-    run(timings, compare, name, model, text, iters, warmup)
-
-
-def run_bench_sentencepiece(
-    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int
-) -> None:
-    from ..benches.sentencepiece import run
-
-    text = open(text, encoding='utf-8', newline='\n').read()
-    run(timings, compare, name, model, text, iters, warmup)
-
-
-def run_bench_tokenizers(
-    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int
-) -> None:
-    from ..benches.tokenizers import run
-
-    text = open(text, encoding='utf-8', newline='\n').read()
-    run(timings, compare, name, model, text, iters, warmup)
-
-
-def run_bench_tekken(
-    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int
+@bench()
+def run_encode(
+    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int, tokenizer: str
 ) -> None:
-    from ..benches.tekken import run
+    from .adapter import get_adapter
+    from .timer import BenchmarkTimer
 
     text = open(text, encoding='utf-8', newline='\n').read()
-    run(timings, compare, name, model, text, iters, warmup)
-
-
-def run_bench_meta(
-    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int
+    adapter = get_adapter(tokenizer)
+    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare) as tm:
+        adapter.load(model)
+        encode = adapter.encode
+        tm.record_work(**text_work([text], len(encode(text)), 10))
+        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+            with timing_iteration:
+                for _ in range(timing_iteration.repeat):
+                    encode(text)
+
+
+@bench()
+def run_batch(
+    timings: str,
+    compare: str | None,
+    name: str,
+    model: str,
+    text: str,
+    iters: int,
+    warmup: int,
+    tokenizer: str,
+    batch_size: int,
 ) -> None:
-    from ..benches.meta import run
-
-    text = open(text, encoding='utf-8', newline='\n').read()
-    run(timings, compare, name, model, text, iters, warmup)
-
-
-def run_bench_gptbpe(
-    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int
-) -> None:
-    from ..benches.gptbpe import run
-
-    text = open(text, encoding='utf-8', newline='\n').read()
-    run(timings, compare, name, model, text, iters, warmup)
-
-
-def run_bench_llamacpp(
-    timings: str, compare: str | None, name: str, model: str, text: str, iters: int, warmup: int
-) -> None:
-    from ..benches.llamacpp import run
-
-    text = open(text, encoding='utf-8', newline='\n').read()
-    run(timings, compare, name, model, text, iters, warmup)
+    from .adapter import get_adapter
+    from .timer import BenchmarkTimer
+
+    texts = split_documents(open(text, encoding='utf-8', newline='\n').read())
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    adapter = get_adapter(tokenizer)
+    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare, repeat=1) as tm:
+        adapter.load(model)
+        encode_batch = adapter.encode_batch
+        tokens = sum(len(ids) for ids in encode_batch(texts))
+        tm.record_work(documents=len(texts), **text_work(texts, tokens))
+        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+            with timing_iteration:
+                for _ in range(timing_iteration.repeat):
+                    for batch in batches:
+                        encode_batch(batch)
 
 
 datasets = OrderedDict([
@@ -131,164 +125,107 @@ datasets = OrderedDict([
     ('wagahai', 'data/wagahai.txt'),
 ])  # fmt: skip
 
-tokenizers = OrderedDict([
-    ('kitoken', run_bench_kitoken),
-    ('tiktoken', run_bench_tiktoken),
-    ('sentencepiece', run_bench_sentencepiece),
-    ('tokenizers', run_bench_tokenizers),
-    ('tekken', run_bench_tekken),
-    ('meta', run_bench_meta),
-    ('gpt_bpe', run_bench_gptbpe),
-    ('llamacpp', run_bench_llamacpp),
-])  # fmt: skip
 
-benchmarks = OrderedDict([
-    ('gpt2', OrderedDict([
-        ('kitoken', {
-            'model': 'models/gpt2.json',
-            'slow': [],
-            'inf': [],
-        }),
-        ('tiktoken', {
-            'model': 'gpt2',
-            'slow': ['utf8 sequence'],
-            'inf': [],
-        }),
-        ('tokenizers', {
-            'model': 'models/gpt2.json',
-            'slow': [],
-            'inf': [],
-        }),
-        ('gpt_bpe', {
-            'model': 'gpt2',
-            'slow': [],
-            'inf': ['utf8 sequence'],
-        }),
-    ])),
-    ('gpt_oss', OrderedDict([
-        ('kitoken', {
-            'model': 'models/gpt_oss.json',
-            'slow': [],
-            'inf': [],
-        }),
-        ('tokenizers', {
-            'model': 'models/gpt_oss.json',
-            'slow': [],
-            'inf': [],
-        }),
-    ])),
-    ('llama2', OrderedDict([
-        ('kitoken', {
-            'model': 'models/llama2.model',
-            'slow': [],
-            'inf': [],
-        }),
-        ('sentencepiece', {
-            'model': 'models/llama2.model',
-            'slow': [],
-            'inf': [],
-        }),
-        ('tokenizers', {
-            'model': 'models/llama2.json',
-            'slow': [],
-            'inf': [],
-        }),
-        ('gpt_bpe', {
-            'model': 'llama-tokenizer',
-            'slow': [],
-            'inf': [],
-        }),
-        ('llamacpp', {
-            'model': 'models/llama-2-7b.Q2_K.gguf',
-            'slow': ['pride and prejudice'],
-            'inf': ['utf8 sequence'],
-        }),
-    ])),
-    ('llama32', OrderedDict([
-        ('kitoken', {
-            'model': 'models/llama32.json',
-            'slow': [],
-            'inf': [],
-        }),
-        ('tokenizers', {
-            'model': 'models/llama32.json',
-            'slow': [],
-            'inf': [],
-        }),
-    ])),
-    ('llama33', OrderedDict([
-        ('kitoken', {
-            'model': 'models/llama33.json',
-            'slow': [],
-            'inf': [],
-        }),
-        ('tokenizers', {
-            'model': 'models/llama33.json',
-            'slow': [],
-            'inf': [],
-        }),
-    ])),
-    ('llama4', OrderedDict([
-        ('kitoken', {
-            'model': 'models/llama4.meta',
-            'slow': [],
-            'inf': [],
-        }),
-        ('meta', {
-            'model': 'models/llama4.meta',
-            'slow': ['utf8 sequence'],
-            'inf': [],
-        }),
-        ('tokenizers', {
-            'model': 'models/llama33.json',
-            'slow': [],
-            'inf': [],
-        }),
-    ])),
-    ('cl100k', OrderedDict([
-        ('kitoken', {
-            'model': 'models/cl100k_base.tiktoken',
-            'slow': [],
-            'inf': [],
-        }),
-        ('tiktoken', {
-            'model': 'cl100k_base',
-            'slow': ['utf8 sequence'],
-            'inf': [],
-        }),
-    ])),
-    ('xlnet', OrderedDict([
-        ('kitoken', {
-            'model': 'models/xlnet_base_cased.model',
-            'slow': [],
-            'inf': [],
-        }),
-        ('sentencepiece', {
-            'model': 'models/xlnet_base_cased.model',
-            'slow': ['utf8 sequence'],
-            'inf': [],
-        }),
-        ('tokenizers', {
-            'model': 'models/xlnet_base_cased.json',
-            'slow': [],
-            'inf': [],
-        }),
-    ])),
-    ('mistral', OrderedDict([
-        ('kitoken', {
-            'model': 'models/mistral2410-tekken.json',
-            'slow': [],
-            'inf': [],
-        }),
-        ('tekken', {
-            'model': 'models/mistral2410-tekken.json',
-            'slow': ['utf8 sequence'],
-            'inf': [],
-        }),
-        ('tokenizers', {
-            'model': 'models/mistral2410.json',
-            'slow': [],
-            'inf': [],
-        })
-    ])),
+class SyntheticDataset(TypedDict):
+    generator: str
+    size: int
+    seed: int
+
+
+# synthetic datasets for pre-tokenizer edge cases, generated with a generator from synthetic.py at the given
+# size in bytes and seed on first use and cached in data/generated, run when selected or with --synthetic
+synthetic_datasets: OrderedDict[str, SyntheticDataset] = OrderedDict([
+    ('code', {'generator': 'code', 'size': 1024 * 1024, 'seed': 0}),
+    ('json', {'generator': 'json', 'size': 1024 * 1024, 'seed': 0}),
+    ('whitespace runs', {'generator': 'whitespace runs', 'size': 1024 * 1024, 'seed': 0}),
+    ('digit runs', {'generator': 'digit runs', 'size': 1024 * 1024, 'seed': 0}),
+    ('emoji', {'generator': 'emoji', 'size': 1024 * 1024, 'seed': 0}),
+    ('mixed scripts', {'generator': 'mixed scripts', 'size': 1024 * 1024, 'seed': 0}),
+    ('no whitespace', {'generator': 'no whitespace', 'size': 1024 * 1024, 'seed': 0}),
 ])  # fmt: skip
+
+batch_sizes = [1, 32, 256]
+
+decode_modes = ['full', 'incremental']
+
+scaling_modes = ['threads', 'processes']
+
+chunk_sizes = [64 * 1024, 1024 * 1024]
+
+coldstart_dataset = 'pride and prejudice'
+
+# range of characters per request and number of requests for the latency suite
+request_sizes = (50, 5000)
+request_count = 1000
+
+# benchmark matrix of models and their tokenizer configurations, see the file for the format
+benchmarks_config = 'benchmarks.toml'
+
+config_keys = {'model': str, 'slow': list, 'inf': list, 'iterations': dict, 'warmup': dict, 'timeout': int}
+
+suites = ['encode', 'batch', 'decode', 'scaling', 'stream', 'coldstart', 'latency']
+
+
+def valid_count(value: Any, minimum: int) -> bool:
+    # booleans are ints in python but not in toml
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+
+def load_benchmarks(path: str = benchmarks_config) -> OrderedDict[str, OrderedDict[str, dict[str, Any]]]:
+    import tomllib
+
+    with open(path, 'rb') as f:
+        config = tomllib.load(f)
+    benchmarks: OrderedDict[str, OrderedDict[str, dict[str, Any]]] = OrderedDict()
+    for model, tokenizers in config.items():
+        if not isinstance(tokenizers, dict):
+            raise ValueError(f'Invalid benchmark config {path}: {model} must be a table of tokenizers')
+        benchmarks[model] = OrderedDict()
+        for tok, params in tokenizers.items():
+            if not isinstance(params, dict):
+                raise ValueError(f'Invalid benchmark config {path}: {model}.{tok} must be a table')
+            for key, value in params.items():
+                if key not in config_keys:
+                    raise ValueError(f'Invalid benchmark config {path}: unknown key {key} in {model}.{tok}')
+                minimum = 0 if key == 'warmup' else 1
+                if config_keys[key] is int:
+                    valid = valid_count(value, minimum)
+                elif config_keys[key] is dict:
+                    # iteration counts by suite, so a count meant for one suite doesn't apply to the others
+                    valid = isinstance(value, dict) and all(
+                        suite in suites and valid_count(count, minimum) for suite, count in value.items()
+                    )
+                else:
+                    valid = isinstance(value, config_keys[key])
+                if not valid:
+                    raise ValueError(f'Invalid benchmark config {path}: invalid {key} in {model}.{tok}')
+            if 'model' not in params:
+                raise ValueError(f'Invalid benchmark config {path}: missing model in {model}.{tok}')
+            benchmarks[model][tok] = {
+                'slow': [],
+                'inf': [],
+                'iterations': {},
+                'warmup': {},
+                'timeout': None,
+                **params,
+            }
+    return benchmarks
+
+
+def preflight(tok: str, params: dict[str, Any]) -> str | None:
+    # checks what can be checked without importing the library or loading the model and returns why it can't run
+    from .adapter import adapters
+
+    import importlib.util
+
+    adapter = adapters().get(tok)
+    if adapter is None:
+        return f'unknown tokenizer {tok}'
+    for module in adapter.imports:
+        try:
+            found = importlib.util.find_spec(module) is not None
+        except ModuleNotFoundError:
+            found = False
+        if not found:
+            return f'module {module} is not installed'
+    return adapter().check(params['model'])
@@ -0,0 +1,80 @@
+from .bench import bench, split_documents, text_work
+
+import json
+import subprocess
+import sys
+import time
+
+
+phases = ['process', 'import', 'load', 'first encode']
+
+
+def probe(tokenizer: str, model: str, text: str) -> dict[str, float]:
+    from .adapter import adapters
+
+    # adapters only import their library when asked to, so discovering them here is not measured
+    adapter = adapters()[tokenizer]()
+    start = time.perf_counter()
+    adapter.import_modules()
+    imported = time.perf_counter()
+    adapter.load(model)
+    loaded = time.perf_counter()
+    tokens = adapter.encode(text)
+    encoded = time.perf_counter()
+    return {
+        'import': imported - start,
+        'load': loaded - imported,
+        'first encode': encoded - loaded,
+        'tokens': len(tokens),
+    }
+
+
+def spawn(tokenizer: str, model: str, text: str) -> dict[str, float]:
+    start = time.perf_counter()
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, '-m', 'bench.utils.coldstart', tokenizer, model, text],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f'Cold start of {tokenizer} failed: {result.stderr.strip()}')
+    return {'process': elapsed, **json.loads(result.stdout.splitlines()[-1])}
+
+
+@bench()
+def run_coldstart(
+    timings: str,
+    compare: str | None,
+    name: str,
+    model: str,
+    text: str,
+    iters: int,
+    warmup: int,
+    tokenizer: str,
+) -> None:
+    from .timer import BenchmarkTimer
+
+    text = split_documents(open(text, encoding='utf-8', newline='\n').read())[0]
+    samples: list[dict[str, float]] = []
+    with BenchmarkTimer(
+        name=f'{name} - process', output_dir=timings, compare_dir=compare, repeat=1, measure_memory=False
+    ) as tm:
+        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+            with timing_iteration:
+                results = [spawn(tokenizer, model, text) for _ in range(timing_iteration.repeat)]
+            if not timing_iteration.is_warmup:
+                samples.extend(results)
+        tm.record_work(documents=1)
+    for phase in phases[1:]:
+        with BenchmarkTimer(
+            name=f'{name} - {phase}', output_dir=timings, compare_dir=compare, repeat=1, measure_memory=False
+        ) as tm:
+            if phase == 'first encode':
+                tm.record_work(documents=1, **text_work([text], int(samples[0]['tokens']) if samples else 0))
+            tm.record_timings([sample[phase] for sample in samples], warmup=warmup)
+
+
+if __name__ == '__main__':
+    print(json.dumps(probe(sys.argv[1], sys.argv[2], sys.argv[3])))
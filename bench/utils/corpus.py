@@ -0,0 +1,76 @@
+import mmap
+import os
+
+from collections.abc import Iterator
+
+
+size_units = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3}
+
+
+def parse_size(spec: str) -> int:
+    spec = spec.strip().upper().removesuffix('B')
+    unit = spec[-1] if spec and spec[-1] in size_units else ''
+    value = float(spec.removesuffix(unit)) if unit else float(spec)
+    if value <= 0:
+        raise ValueError(f'Invalid size: {spec}')
+    return int(value * size_units[unit])
+
+
+def format_size(size: int) -> str:
+    for unit in ['G', 'M', 'K']:
+        if size >= size_units[unit] and size % size_units[unit] == 0:
+            return f'{size // size_units[unit]}{unit}'
+    return str(size)
+
+
+def scaled_corpus(path: str, size: int, directory: str = 'data/generated') -> str:
+    # repeats the source document until the target size is reached, cut at a line boundary
+    name = os.path.splitext(os.path.basename(path))[0]
+    output = os.path.join(directory, f'{name}-{format_size(size)}.txt')
+    if os.path.isfile(output):
+        return output
+    with open(path, 'rb') as f:
+        source = f.read().rstrip(b'\n') + b'\n'
+    os.makedirs(directory, exist_ok=True)
+    partial = f'{output}.partial'
+    with open(partial, 'wb') as f:
+        written = 0
+        while written + len(source) <= size:
+            f.write(source)
+            written += len(source)
+        if written == 0:
+            f.write(source[: chunk_boundary(source, 0, size)])
+        elif b'\n' in source[: size - written]:
+            f.write(source[: source.rindex(b'\n', 0, size - written) + 1])
+    os.replace(partial, output)
+    return output
+
+
+def chunk_boundary(data: bytes | mmap.mmap, start: int, end: int) -> int:
+    # prefer newlines, then spaces in the second half of the chunk, then any utf-8 character boundary
+    for separator in [b'\n', b' ']:
+        position = data.rfind(separator, start + (end - start) // 2, end)
+        if position >= 0:
+            return position + 1
+    while end > start and data[end] & 0xC0 == 0x80:
+        end -= 1
+    if end > start:
+        return end
+    end = start + 1
+    while end < len(data) and data[end] & 0xC0 == 0x80:
+        end += 1
+    return end
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[str]:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < len(data):
+                end = start + chunk_size
+                if end < len(data):
+                    end = chunk_boundary(data, start, end)
+                yield data[start:end].decode('utf-8')
+                start = end
@@ -0,0 +1,69 @@
+from .bench import bench, split_documents, text_work
+
+from collections.abc import Callable, Iterator, Sequence
+
+
+def decode_stream(decode: Callable[[Sequence[int]], str], ids: list[int]) -> Iterator[str]:
+    # emits text as soon as it is complete, decoding a short window of previous tokens with every new token
+    # so that merges and incomplete utf-8 sequences across token boundaries are handled like streaming servers do
+    prefix_offset = 0
+    read_offset = 0
+    for i in range(len(ids)):
+        prefix_text = decode(ids[prefix_offset:read_offset])
+        new_text = decode(ids[prefix_offset : i + 1])
+        if len(new_text) > len(prefix_text) and not new_text.endswith('\ufffd'):
+            yield new_text[len(prefix_text) :]
+            prefix_offset = read_offset
+            read_offset = i + 1
+
+
+@bench()
+def run_decode(
+    timings: str,
+    compare: str | None,
+    name: str,
+    model: str,
+    text: str,
+    iters: int,
+    warmup: int,
+    tokenizer: str,
+    modes: list[str],
+) -> None:
+    from .adapter import get_adapter
+    from .timer import BenchmarkTimer
+
+    import gc
+
+    text = open(text, encoding='utf-8', newline='\n').read()
+    for mode in modes:
+        # the model is loaded inside each timer so its memory is attributed to the model of that result
+        adapter = get_adapter(tokenizer)
+        if mode == 'full':
+            with BenchmarkTimer(name=f'{name} - decode full', output_dir=timings, compare_dir=compare) as tm:
+                adapter.load(model)
+                decode = adapter.decode
+                ids = [int(i) for i in adapter.encode_ids(text)]
+                tm.record_work(**text_work([decode(ids)], len(ids), 10))
+                for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+                    with timing_iteration:
+                        for _ in range(timing_iteration.repeat):
+                            decode(ids)
+        else:
+            with BenchmarkTimer(
+                name=f'{name} - decode incremental', output_dir=timings, compare_dir=compare, repeat=1
+            ) as tm:
+                adapter.load(model)
+                decode = adapter.decode
+                # generated sequences are bounded, so documents are streamed one by one
+                documents = [[int(i) for i in adapter.encode_ids(document)] for document in split_documents(text)]
+                decoded = [''.join(decode_stream(decode, ids)) for ids in documents]
+                tm.record_work(documents=len(documents), **text_work(decoded, sum(len(ids) for ids in documents)))
+                for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+                    with timing_iteration:
+                        for _ in range(timing_iteration.repeat):
+                            for ids in documents:
+                                for _ in decode_stream(decode, ids):
+                                    pass
+        # released before the next timer measures its baseline
+        del adapter, decode
+        gc.collect()
@@ -0,0 +1,83 @@
+import numpy as np
+
+
+class LatencyHistogram:
+    # log-linear buckets like hdr histograms: values below 2 * sub_buckets are exact, larger values are
+    # grouped into sub_buckets buckets per power of two, keeping the relative error below 1 / sub_buckets
+    sub_bucket_bits: int = 7
+    counts: dict[int, int]
+
+    def __init__(self: 'LatencyHistogram') -> None:
+        self.counts = {}
+
+    @property
+    def sub_buckets(self: 'LatencyHistogram') -> int:
+        return 1 << self.sub_bucket_bits
+
+    def bucket(self: 'LatencyHistogram', values: np.ndarray) -> np.ndarray:
+        # frexp gives the bit length of integers exactly up to 2^53 ns
+        bit_length = np.frexp(values.astype(np.float64))[1].astype(np.int64)
+        magnitude = np.maximum(0, bit_length - self.sub_bucket_bits - 1)
+        return magnitude * self.sub_buckets + (values >> magnitude)
+
+    def lowest_value(self: 'LatencyHistogram', bucket: int) -> int:
+        magnitude = max(0, bucket // self.sub_buckets - 1)
+        return (bucket - magnitude * self.sub_buckets) << magnitude
+
+    def record(self: 'LatencyHistogram', values_ns: np.ndarray) -> None:
+        values = np.maximum(np.asarray(values_ns, dtype=np.int64), 0)
+        if len(values) == 0:
+            return
+        buckets, counts = np.unique(self.bucket(values), return_counts=True)
+        for bucket, count in zip(buckets.tolist(), counts.tolist(), strict=True):
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+
+    def count(self: 'LatencyHistogram') -> int:
+        return sum(self.counts.values())
+
+    def values(self: 'LatencyHistogram') -> tuple[np.ndarray, np.ndarray]:
+        # lowest value and count of every non-empty bucket, sorted by value
+        buckets = sorted(self.counts)
+        return (
+            np.array([self.lowest_value(bucket) for bucket in buckets], dtype=np.int64),
+            np.array([self.counts[bucket] for bucket in buckets], dtype=np.int64),
+        )
+
+    def percentile(self: 'LatencyHistogram', p: float) -> float:
+        if len(self.counts) == 0:
+            return 0
+        values, counts = self.values()
+        rank = max(1, int(np.ceil(p / 100 * counts.sum())))
+        return float(values[np.searchsorted(np.cumsum(counts), rank)])
+
+    def octaves(self: 'LatencyHistogram') -> list[tuple[int, int]]:
+        # counts per power of two of nanoseconds, as upper bound and count, for a compact overview
+        if len(self.counts) == 0:
+            return []
+        values, counts = self.values()
+        exponents = np.frexp(np.maximum(values, 1).astype(np.float64))[1]
+        octaves = np.bincount(exponents, weights=counts).astype(np.int64)
+        first = int(np.flatnonzero(octaves)[0])
+        return [(1 << exponent, int(octaves[exponent])) for exponent in range(first, len(octaves))]
+
+    def to_list(self: 'LatencyHistogram') -> list[list[int]]:
+        values, counts = self.values()
+        return [[int(value), int(count)] for value, count in zip(values, counts, strict=True)]
+
+    @staticmethod
+    def from_list(pairs: list[list[int]]) -> 'LatencyHistogram':
+        histogram = LatencyHistogram()
+        for value, count in pairs:
+            bucket = int(histogram.bucket(np.array([value], dtype=np.int64))[0])
+            histogram.counts[bucket] = histogram.counts.get(bucket, 0) + count
+        return histogram
+
+
+def format_duration(ns: float) -> str:
+    if ns < 1_000:
+        return f'{ns:.0f}ns'
+    if ns < 1_000_000:
+        return f'{ns / 1_000:.1f}µs'
+    if ns < 1_000_000_000:
+        return f'{ns / 1_000_000:.2f}ms'
+    return f'{ns / 1_000_000_000:.3f}s'
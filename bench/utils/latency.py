@@ -0,0 +1,59 @@
+from .bench import bench, text_work
+
+import time
+
+
+def request_samples(text: str, min_chars: int, max_chars: int, count: int, seed: int = 0) -> list[str]:
+    # consecutive slices of the text with log-uniformly distributed lengths, wrapping around at the end
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    lengths = np.exp(rng.uniform(np.log(min_chars), np.log(max_chars + 1), count)).astype(np.int64)
+    samples = []
+    start = 0
+    for length in lengths.tolist():
+        if start >= len(text):
+            start = 0
+        sample = text[start : start + length]
+        start += len(sample)
+        samples.append(sample)
+    return samples
+
+
+@bench()
+def run_latency(
+    timings: str,
+    compare: str | None,
+    name: str,
+    model: str,
+    text: str,
+    iters: int,
+    warmup: int,
+    tokenizer: str,
+    min_chars: int,
+    max_chars: int,
+    count: int,
+) -> None:
+    from .adapter import get_adapter
+    from .timer import BenchmarkTimer
+
+    text = open(text, encoding='utf-8', newline='\n').read()
+    samples = request_samples(text, min_chars, max_chars, count)
+    adapter = get_adapter(tokenizer)
+    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare, repeat=1) as tm:
+        adapter.load(model)
+        encode = adapter.encode
+        tokens = sum(len(encode(sample)) for sample in samples)
+        tm.record_work(requests=len(samples), **text_work(samples, tokens))
+        tm.record_stats(min_chars=min_chars, max_chars=max_chars)
+        perf_counter_ns = time.perf_counter_ns
+        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+            latencies: list[int] = []
+            append = latencies.append
+            with timing_iteration:
+                for _ in range(timing_iteration.repeat):
+                    for sample in samples:
+                        start = perf_counter_ns()
+                        encode(sample)
+                        append(perf_counter_ns() - start)
+            timing_iteration.record_latencies(latencies)
@@ -0,0 +1,49 @@
+import sys
+
+
+def _read_kb(path: str, keys: list[str]) -> dict[str, int]:
+    values: dict[str, int] = {}
+    try:
+        with open(path, encoding='utf8') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in keys:
+                    values[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    return values
+
+
+def memory_usage() -> dict[str, int]:
+    status = _read_kb('/proc/self/status', ['VmRSS', 'VmHWM'])
+    rollup = _read_kb('/proc/self/smaps_rollup', ['Private_Clean', 'Private_Dirty'])
+    usage: dict[str, int] = {}
+    if 'VmRSS' in status:
+        usage['rss'] = status['VmRSS']
+    if 'VmHWM' in status:
+        usage['peak'] = status['VmHWM']
+    else:
+        try:
+            import resource
+        except ImportError:
+            return usage
+        # ru_maxrss is in kilobytes on linux and in bytes on macos
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['peak'] = maxrss if sys.platform == 'darwin' else maxrss * 1024
+    if len(rollup) > 0:
+        usage['uss'] = sum(rollup.values())
+    return usage
+
+
+def reset_peak() -> bool:
+    # resets VmHWM to the current rss, supported on linux since 4.0
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='utf8') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def format_bytes(value: float) -> str:
+    return f'{value / 1024 / 1024:,.1f} MiB'
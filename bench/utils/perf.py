@@ -0,0 +1,136 @@
+import ctypes
+import os
+import platform
+import struct
+
+from collections import OrderedDict
+
+
+# perf_event_open(2) constants
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_HW_CACHE = 3
+PERF_COUNT_HW_CPU_CYCLES = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+PERF_COUNT_HW_CACHE_MISSES = 3
+PERF_COUNT_HW_BRANCH_MISSES = 5
+PERF_COUNT_HW_CACHE_L1D = 0
+PERF_COUNT_HW_CACHE_OP_READ = 0
+PERF_COUNT_HW_CACHE_RESULT_MISS = 1
+PERF_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+PERF_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+PERF_EVENT_IOC_ENABLE = 0x2400
+PERF_EVENT_IOC_DISABLE = 0x2401
+PERF_EVENT_IOC_RESET = 0x2403
+PERF_FLAG_DISABLED = 1 << 0
+PERF_FLAG_INHERIT = 1 << 1
+PERF_FLAG_EXCLUDE_KERNEL = 1 << 5
+PERF_FLAG_EXCLUDE_HV = 1 << 6
+
+syscall_numbers = {'x86_64': 298, 'aarch64': 241, 'arm64': 241, 'riscv64': 241, 'ppc64le': 319, 's390x': 331}
+
+events = OrderedDict([
+    ('cycles', (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CPU_CYCLES)),
+    ('instructions', (PERF_TYPE_HARDWARE, PERF_COUNT_HW_INSTRUCTIONS)),
+    ('l1d misses', (
+        PERF_TYPE_HW_CACHE,
+        PERF_COUNT_HW_CACHE_L1D | PERF_COUNT_HW_CACHE_OP_READ << 8 | PERF_COUNT_HW_CACHE_RESULT_MISS << 16,
+    )),
+    ('llc misses', (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_MISSES)),
+    ('branch misses', (PERF_TYPE_HARDWARE, PERF_COUNT_HW_BRANCH_MISSES)),
+])  # fmt: skip
+
+
+class PerfEventAttr(ctypes.Structure):
+    # first version of the struct, accepted by all kernels with perf events
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('size', ctypes.c_uint32),
+        ('config', ctypes.c_uint64),
+        ('sample_period', ctypes.c_uint64),
+        ('sample_type', ctypes.c_uint64),
+        ('read_format', ctypes.c_uint64),
+        ('flags', ctypes.c_uint64),
+        ('wakeup_events', ctypes.c_uint32),
+        ('bp_type', ctypes.c_uint32),
+        ('config1', ctypes.c_uint64),
+    ]
+
+
+def perf_event_open(event_type: int, config: int) -> int:
+    number = syscall_numbers.get(platform.machine())
+    if number is None:
+        raise OSError(f'perf events are not supported on {platform.machine()}')
+    libc = ctypes.CDLL(None, use_errno=True)
+    attr = PerfEventAttr()
+    attr.type = event_type
+    attr.size = ctypes.sizeof(PerfEventAttr)
+    attr.config = config
+    attr.read_format = PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING
+    attr.flags = PERF_FLAG_DISABLED | PERF_FLAG_INHERIT | PERF_FLAG_EXCLUDE_KERNEL | PERF_FLAG_EXCLUDE_HV
+    # pid 0 and cpu -1 count this process on any cpu
+    fd = libc.syscall(number, ctypes.byref(attr), 0, -1, -1, 0)
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return fd
+
+
+class PerfCounters:
+    fds: OrderedDict[str, int]
+
+    def __init__(self: 'PerfCounters') -> None:
+        import fcntl
+
+        self._ioctl = fcntl.ioctl
+        self.fds = OrderedDict()
+        for name, (event_type, config) in events.items():
+            try:
+                self.fds[name] = perf_event_open(event_type, config)
+            except OSError:
+                # not every cpu or virtual machine exposes every event
+                continue
+        if len(self.fds) == 0:
+            raise OSError('No perf events available')
+
+    def start(self: 'PerfCounters') -> None:
+        for fd in self.fds.values():
+            self._ioctl(fd, PERF_EVENT_IOC_RESET, 0)
+            self._ioctl(fd, PERF_EVENT_IOC_ENABLE, 0)
+
+    def stop(self: 'PerfCounters') -> dict[str, float]:
+        for fd in self.fds.values():
+            self._ioctl(fd, PERF_EVENT_IOC_DISABLE, 0)
+        counts: dict[str, float] = {}
+        for name, fd in self.fds.items():
+            value, enabled, running = struct.unpack('QQQ', os.read(fd, 24))
+            # scale counts of multiplexed events to the full time they were enabled
+            counts[name] = value * enabled / running if running > 0 else 0.0
+        return counts
+
+    def close(self: 'PerfCounters') -> None:
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds.clear()
+
+
+def open_counters() -> PerfCounters | None:
+    try:
+        return PerfCounters()
+    except (OSError, ImportError, AttributeError):
+        return None
+
+
+def derived_metrics(counters: dict[str, float], work: dict[str, float]) -> dict[str, float]:
+    metrics: dict[str, float] = {}
+    if counters.get('cycles') and 'instructions' in counters:
+        metrics['IPC'] = counters['instructions'] / counters['cycles']
+    if work.get('bytes'):
+        kilobytes = work['bytes'] / 1000
+        if 'instructions' in counters:
+            metrics['instructions/byte'] = counters['instructions'] / work['bytes']
+        if 'cycles' in counters:
+            metrics['cycles/byte'] = counters['cycles'] / work['bytes']
+        for name in ['l1d misses', 'llc misses', 'branch misses']:
+            if name in counters:
+                metrics[f'{name}/kB'] = counters[name] / kilobytes
+    return metrics
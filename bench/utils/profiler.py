@@ -0,0 +1,89 @@
+import functools
+import os
+import signal
+import time
+
+from collections import Counter
+from types import FrameType
+
+
+class SamplingProfiler:
+    # samples the python stack of the main thread on a cpu time interval timer
+    interval: float
+    stacks: Counter[str]
+    _running: bool
+    _sampling: bool
+    _last: float
+
+    def __init__(self: 'SamplingProfiler', interval: float = 0.001) -> None:
+        self.interval = interval
+        self.stacks = Counter()
+        self._running = False
+        self._sampling = False
+        self._last = 0.0
+        self._call_opcodes = self.call_opcodes()
+
+    @staticmethod
+    def call_opcodes() -> set[int]:
+        import dis
+
+        return {dis.opmap[name] for name in ['CALL', 'CALL_FUNCTION_EX', 'CALL_KW'] if name in dis.opmap}
+
+    def start(self: 'SamplingProfiler') -> None:
+        if self._running:
+            return
+        self._running = True
+        self._last = time.process_time()
+        signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self: 'SamplingProfiler') -> None:
+        if not self._running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        self._running = False
+
+    def sample(self: 'SamplingProfiler', signum: int, frame: FrameType | None) -> None:
+        # handlers only run between bytecodes, so a signal raised while native code runs is delivered
+        # after it returns and pending signals are merged; weighting samples by the cpu time since
+        # the previous one keeps long native calls from being undercounted
+        if self._sampling:
+            # the time of samples taken while sampling is added to the next sample
+            return
+        self._sampling = True
+        try:
+            now = time.process_time()
+            weight = round((now - self._last) * 1_000_000)
+            self._last = now
+            if frame is None or weight <= 0:
+                return
+            names: list[str] = []
+            if frame.f_lasti >= 0 and frame.f_code.co_code[frame.f_lasti] in self._call_opcodes:
+                names.append('[native]')
+            while frame is not None:
+                names.append(f'{frame.f_code.co_qualname} ({relative_path(frame.f_code.co_filename)})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += weight
+        finally:
+            self._sampling = False
+
+    def write(self: 'SamplingProfiler', path: str) -> None:
+        # collapsed stacks as read by flamegraph.pl, speedscope and inferno, weighted in cpu microseconds
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            for stack, weight in self.stacks.most_common():
+                f.write(f'{stack} {weight}\n')
+
+
+@functools.cache
+def relative_path(path: str) -> str:
+    # installed libraries are shown relative to site-packages, everything else relative to the repository
+    _, separator, installed = path.rpartition(f'site-packages{os.sep}')
+    if separator:
+        return installed
+    try:
+        relative = os.path.relpath(path)
+    except ValueError:
+        return path
+    return path if relative.startswith('..') else relative
@@ -0,0 +1,247 @@
+import json
+import os
+import platform
+import socket
+import sqlite3
+import subprocess
+import uuid
+
+from datetime import UTC, datetime
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started TEXT NOT NULL,
+    git_commit TEXT,
+    host TEXT,
+    cpu_model TEXT,
+    platform TEXT,
+    python TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    recorded TEXT NOT NULL,
+    name TEXT NOT NULL,
+    tokenizer TEXT,
+    library_version TEXT,
+    model TEXT,
+    dataset TEXT,
+    variant TEXT,
+    iterations INTEGER NOT NULL,
+    timings TEXT NOT NULL,
+    work TEXT NOT NULL,
+    stats TEXT NOT NULL,
+    params TEXT NOT NULL,
+    memory TEXT NOT NULL DEFAULT '{}',
+    counters TEXT NOT NULL DEFAULT '{}',
+    latencies TEXT NOT NULL DEFAULT '[]',
+    avg REAL,
+    med REAL,
+    std REAL,
+    min REAL,
+    max REAL
+);
+CREATE INDEX IF NOT EXISTS results_name ON results (name, id);
+'''  # fmt: skip
+
+# columns added after the first version of the schema, added to existing stores on connect
+COLUMNS = [
+    ('results', 'memory', "TEXT NOT NULL DEFAULT '{}'"),
+    ('results', 'counters', "TEXT NOT NULL DEFAULT '{}'"),
+    ('results', 'latencies', "TEXT NOT NULL DEFAULT '[]'"),
+]
+
+RUN_ID_ENV = 'TOKENIZER_BENCH_RUN_ID'
+
+
+def current_run_id() -> str:
+    run_id = os.environ.get(RUN_ID_ENV)
+    if not run_id:
+        run_id = f'{datetime.now(UTC).strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        os.environ[RUN_ID_ENV] = run_id
+    return run_id
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],  # noqa: S607
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=False,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def cpu_model() -> str:
+    try:
+        with open('/proc/cpuinfo', encoding='utf8') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def library_version(tokenizer: str) -> str | None:
+    from .adapter import adapters
+
+    adapter = adapters().get(tokenizer)
+    library = adapter.library if adapter is not None else None
+    if library is None:
+        return None
+    try:
+        return version(library)
+    except PackageNotFoundError:
+        return None
+
+
+def split_name(name: str) -> tuple[str | None, str | None, str | None, str | None]:
+    parts = name.split(' - ', 3)
+    if len(parts) < 3:
+        return None, None, None, None
+    return parts[0], parts[1], parts[2], parts[3] if len(parts) > 3 else None
+
+
+class ResultsStore:
+    path: str
+
+    def __init__(self: 'ResultsStore', directory: str) -> None:
+        self.path = os.path.join(directory, 'results.sqlite')
+
+    def exists(self: 'ResultsStore') -> bool:
+        return os.path.isfile(self.path)
+
+    def connect(self: 'ResultsStore') -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.row_factory = sqlite3.Row
+        connection.executescript(SCHEMA)
+        for table, column, definition in COLUMNS:
+            existing = [row['name'] for row in connection.execute(f'PRAGMA table_info({table})')]
+            if column not in existing:
+                connection.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        return connection
+
+    def append(
+        self: 'ResultsStore',
+        name: str,
+        timings: list[float],
+        work: dict[str, float],
+        stats: dict[str, float],
+        params: dict[str, Any],
+        memory: dict[str, float] | None = None,
+        counters: dict[str, float] | None = None,
+        latencies: list[list[int]] | None = None,
+    ) -> None:
+        import numpy as np
+
+        run_id = current_run_id()
+        tokenizer, model, dataset, variant = split_name(name)
+        now = datetime.now(UTC).isoformat(timespec='seconds')
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute(
+                    'INSERT OR IGNORE INTO runs (run_id, started, git_commit, host, cpu_model, platform, python) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        run_id,
+                        now,
+                        git_commit(),
+                        socket.gethostname(),
+                        cpu_model(),
+                        platform.platform(),
+                        platform.python_version(),
+                    ),
+                )
+                connection.execute(
+                    'INSERT INTO results (run_id, recorded, name, tokenizer, library_version, model, dataset, '
+                    'variant, iterations, timings, work, stats, params, memory, counters, latencies, '
+                    'avg, med, std, min, max) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        run_id,
+                        now,
+                        name,
+                        tokenizer,
+                        library_version(tokenizer) if tokenizer else None,
+                        model,
+                        dataset,
+                        variant,
+                        len(timings),
+                        json.dumps(timings),
+                        json.dumps(work),
+                        json.dumps(stats),
+                        json.dumps(params),
+                        json.dumps(memory or {}),
+                        json.dumps(counters or {}),
+                        json.dumps(latencies or []),
+                        float(np.mean(timings)),
+                        float(np.median(timings)),
+                        float(np.std(timings)),
+                        float(np.min(timings)),
+                        float(np.max(timings)),
+                    ),
+                )
+        finally:
+            connection.close()
+
+    def latest(self: 'ResultsStore', name: str, run_id: str | None = None) -> dict[str, Any] | None:
+        if not self.exists():
+            return None
+        connection = self.connect()
+        try:
+            if run_id is None:
+                row = connection.execute(
+                    'SELECT * FROM results WHERE name = ? ORDER BY id DESC LIMIT 1', (name,)
+                ).fetchone()
+            else:
+                row = connection.execute(
+                    'SELECT * FROM results WHERE name = ? AND run_id = ? ORDER BY id DESC LIMIT 1', (name, run_id)
+                ).fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        record = dict(row)
+        for key in ['timings', 'work', 'stats', 'params', 'memory', 'counters', 'latencies']:
+            record[key] = json.loads(record[key])
+        return record
+
+    def history(self: 'ResultsStore', name: str) -> list[dict[str, Any]]:
+        if not self.exists():
+            return []
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                'SELECT results.run_id, recorded, library_version, git_commit, cpu_model, iterations, avg, med, std '
+                'FROM results JOIN runs ON runs.run_id = results.run_id WHERE name = ? ORDER BY id',
+                (name,),
+            ).fetchall()
+        finally:
+            connection.close()
+        return [dict(row) for row in rows]
+
+    def runs(self: 'ResultsStore') -> list[dict[str, Any]]:
+        if not self.exists():
+            return []
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                'SELECT runs.*, COUNT(results.id) AS results FROM runs '
+                'LEFT JOIN results ON results.run_id = runs.run_id GROUP BY runs.run_id ORDER BY started'
+            ).fetchall()
+        finally:
+            connection.close()
+        return [dict(row) for row in rows]
@@ -0,0 +1,98 @@
+from .bench import bench, split_documents, text_work
+
+import gc
+import multiprocessing
+import os
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+
+_worker_encode: Callable[[str], Any] | None = None
+_worker_texts: list[str] = []
+
+
+def worker_counts(maximum: int | None = None) -> list[int]:
+    if maximum is None:
+        try:
+            maximum = len(os.sched_getaffinity(0))
+        except AttributeError:
+            maximum = os.cpu_count() or 1
+    counts: list[int] = []
+    n = 1
+    while n < maximum:
+        counts.append(n)
+        n *= 2
+    counts.append(maximum)
+    return counts
+
+
+def encode_shard(encode: Callable[[str], Any], texts: list[str]) -> None:
+    for text in texts:
+        encode(text)
+
+
+def _init_worker(tokenizer: str, model: str, texts: list[str]) -> None:
+    from .adapter import get_adapter
+
+    global _worker_encode, _worker_texts  # noqa: PLW0603
+    gc.disable()
+    gc.freeze()
+    adapter = get_adapter(tokenizer)
+    adapter.load(model)
+    _worker_encode = adapter.encode
+    _worker_texts = texts
+
+
+def _encode_worker_shard(shard: int, shards: int) -> None:
+    assert _worker_encode is not None
+    encode_shard(_worker_encode, _worker_texts[shard::shards])
+
+
+@bench()
+def run_scaling(
+    timings: str,
+    compare: str | None,
+    name: str,
+    model: str,
+    text: str,
+    iters: int,
+    warmup: int,
+    tokenizer: str,
+    workers: list[int],
+    modes: list[str],
+) -> None:
+    from .adapter import get_adapter
+    from .timer import BenchmarkTimer
+
+    texts = split_documents(open(text, encoding='utf-8', newline='\n').read())
+    adapter = get_adapter(tokenizer)
+    adapter.load(model)
+    encode = adapter.encode
+    tokens = sum(len(encode(text)) for text in texts)
+    for mode in modes:
+        baseline: float | None = None
+        for n in workers:
+            with BenchmarkTimer(name=f'{name} - {mode} {n}', output_dir=timings, compare_dir=compare, repeat=1) as tm:
+                tm.record_work(documents=len(texts), **text_work(texts, tokens))
+                shards = [texts[shard::n] for shard in range(n)]
+                if mode == 'threads':
+                    with ThreadPoolExecutor(max_workers=n) as pool:
+                        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+                            with timing_iteration:
+                                for _ in range(timing_iteration.repeat):
+                                    list(pool.map(encode_shard, [encode] * n, shards))
+                else:
+                    with multiprocessing.get_context().Pool(
+                        n, initializer=_init_worker, initargs=(tokenizer, model, texts)
+                    ) as pool:
+                        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+                            with timing_iteration:
+                                for _ in range(timing_iteration.repeat):
+                                    pool.starmap(_encode_worker_shard, [(shard, n) for shard in range(n)])
+                if n == 1:
+                    baseline = tm.timings.avg()
+                if baseline is not None:
+                    speedup = baseline / tm.timings.avg() if tm.timings.avg() > 0 else 0
+                    tm.record_stats(speedup=speedup, efficiency=speedup / n)
@@ -0,0 +1,137 @@
+import gc
+import logging
+import os
+import time
+
+from collections import deque
+from collections.abc import Callable
+from multiprocessing import Process  # type: ignore
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+# name, target, arguments and timeout in seconds, None for the default timeout of the scheduler
+Job = tuple[str, Callable[..., Any], tuple[Any, ...], int | None]
+
+
+def available_cpus() -> list[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def parse_cpus(spec: str) -> list[int]:
+    cpus: set[int] = set()
+    for part in spec.split(','):
+        cpu_range = part.strip()
+        if len(cpu_range) == 0:
+            continue
+        if '-' in cpu_range:
+            start, end = cpu_range.split('-', 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(cpu_range))
+    return sorted(cpus)
+
+
+def pin_process(cpus: list[int]) -> None:
+    try:
+        os.sched_setaffinity(0, cpus)
+    except AttributeError:
+        logger.warning('CPU pinning is not supported on this platform')
+
+
+def run_pinned(
+    cpus: list[int] | None, settings: dict[str, Any], target: Callable[..., Any], args: tuple[Any, ...]
+) -> None:
+    from .timer import configure
+
+    if cpus is not None:
+        pin_process(cpus)
+    configure(**settings)
+    target(*args)
+
+
+class Scheduler:
+    concurrency: int
+    core_sets: list[list[int]] | None
+    timeout: int
+    exit_on_error: bool
+    error_trace: bool
+    settings: dict[str, Any]
+
+    def __init__(
+        self: 'Scheduler',
+        concurrency: int = 1,
+        cpus: list[int] | None = None,
+        cpus_per_job: int | None = None,
+        timeout: int = 1200,
+        exit_on_error: bool = False,
+        error_trace: bool = False,
+        settings: dict[str, Any] | None = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.settings = {'show_progress': concurrency == 1, **(settings or {})}
+        self.timeout = timeout
+        self.exit_on_error = exit_on_error
+        self.error_trace = error_trace
+        if cpus is None and cpus_per_job is None and concurrency == 1:
+            self.core_sets = None
+            return
+        cpus = cpus or available_cpus()
+        cpus_per_job = cpus_per_job or max(1, len(cpus) // concurrency)
+        if cpus_per_job * concurrency > len(cpus):
+            raise ValueError(
+                f'Cannot run {concurrency} benchmarks with {cpus_per_job} cores each on {len(cpus)} available cores'
+            )
+        self.core_sets = [cpus[i * cpus_per_job : (i + 1) * cpus_per_job] for i in range(concurrency)]
+
+    def run(self: 'Scheduler', jobs: list[Job]) -> None:
+        pending: deque[Job] = deque(jobs)
+        running: list[tuple[str, Process, list[int] | None, float, int]] = []
+        free: deque[list[int] | None] = deque(self.core_sets or [None] * self.concurrency)
+        try:
+            while len(pending) > 0 or len(running) > 0:
+                while len(pending) > 0 and len(running) < self.concurrency:
+                    name, target, args, timeout = pending.popleft()
+                    cpus = free.popleft()
+                    try:
+                        p = Process(target=run_pinned, args=(cpus, self.settings, target, args))
+                        p.start()
+                    except Exception as e:
+                        free.append(cpus)
+                        if self.exit_on_error:
+                            raise e
+                        if self.error_trace:
+                            logger.exception(e)
+                        else:
+                            logger.error(e)
+                        continue
+                    running.append((name, p, cpus, time.monotonic(), self.timeout if timeout is None else timeout))
+                time.sleep(0.1)
+                for entry in list(running):
+                    name, p, cpus, started, timeout = entry
+                    if p.exitcode is None and time.monotonic() - started < timeout:
+                        continue
+                    if p.exitcode is None:
+                        print()
+                        logger.error(f'Timeout for {name} after {timeout}s')
+                        p.terminate()
+                        while p.is_alive():
+                            time.sleep(0.1)
+                    elif p.exitcode != 0:
+                        logger.error(f'{name} exited with code {p.exitcode}')
+                    p.close()
+                    running.remove(entry)
+                    free.append(cpus)
+                    gc.collect()
+        except KeyboardInterrupt as e:
+            print()
+            for _, p, _, _, _ in running:
+                p.join(timeout=2)
+                p.terminate()
+                p.join()
+                p.close()
+            raise e
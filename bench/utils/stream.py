@@ -0,0 +1,41 @@
+from .bench import bench
+
+import os
+
+
+@bench()
+def run_stream(
+    timings: str,
+    compare: str | None,
+    name: str,
+    model: str,
+    path: str,
+    iters: int,
+    warmup: int,
+    tokenizer: str,
+    chunk_size: int,
+) -> None:
+    from .adapter import get_adapter
+    from .corpus import read_chunks
+    from .timer import BenchmarkTimer
+
+    adapter = get_adapter(tokenizer)
+    with BenchmarkTimer(name=name, output_dir=timings, compare_dir=compare, repeat=1) as tm:
+        adapter.load(model)
+        encode = adapter.encode
+        chunks = 0
+        chars = 0
+        tokens = 0
+        for timing_iteration in tm.iterations(n=iters, warmup=warmup):
+            with timing_iteration:
+                for _ in range(timing_iteration.repeat):
+                    # counted while encoding to avoid an extra pass over the file
+                    chunks = 0
+                    chars = 0
+                    tokens = 0
+                    for chunk in read_chunks(path, chunk_size):
+                        tokens += len(encode(chunk))
+                        chars += len(chunk)
+                        chunks += 1
+        tm.record_work(bytes=os.path.getsize(path), chars=chars, tokens=tokens)
+        tm.record_stats(chunks=chunks, chunk_size=chunk_size)
@@ -0,0 +1,218 @@
+from .corpus import format_size
+
+import json
+import os
+import random
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+
+
+# bumped when a generator changes, so cached corpora of earlier versions are not reused
+version = 1
+
+
+def log_uniform(rng: random.Random, low: int, high: int) -> int:
+    return int(low * (high / low) ** rng.random())
+
+
+def identifier(rng: random.Random) -> str:
+    syllables = ['get', 'set', 'to', 'ken', 'iz', 'er', 'buf', 'fer', 'len', 'idx', 'val', 'map', 'node', 'str']
+    words = [''.join(rng.choices(syllables, k=rng.randint(1, 3))) for _ in range(rng.randint(1, 3))]
+    return rng.choice(['_', '']).join(words) if rng.random() < 0.7 else ''.join(w.title() for w in words)
+
+
+def code(rng: random.Random) -> Iterator[str]:
+    # python-like source with nested indentation, operators, literals and comments
+    operators = [' + ', ' - ', ' * ', ' // ', ' == ', ' != ', ' <= ', ' and ', ' or ', '.', '[', ']', '(', ')']
+    while True:
+        lines = [f'def {identifier(rng)}({", ".join(identifier(rng) for _ in range(rng.randint(0, 4)))}):']
+        depth = 1
+        for _ in range(rng.randint(3, 30)):
+            statement = identifier(rng)
+            for _ in range(rng.randint(0, 6)):
+                statement += rng.choice(operators) + rng.choice(
+                    [identifier(rng), str(rng.randint(0, 1 << 16)), f"'{identifier(rng)}'", f'{rng.random():.4f}']
+                )
+            kind = rng.random()
+            if kind < 0.2 and depth < 8:
+                lines.append(f'{"    " * depth}{rng.choice(["if", "while", "for _ in"])} {statement}:')
+                depth += 1
+                continue
+            if kind < 0.3:
+                lines.append(f'{"    " * depth}# {" ".join(identifier(rng) for _ in range(rng.randint(2, 10)))}')
+            lines.append(f'{"    " * depth}{identifier(rng)} = {statement}')
+            if depth > 1 and rng.random() < 0.2:
+                depth -= 1
+        lines.append(f'    return {identifier(rng)}')
+        yield '\n'.join(lines) + '\n\n\n'
+
+
+def json_value(rng: random.Random, depth: int) -> object:
+    kind = rng.random() if depth < 5 else rng.random() * 0.6
+    if kind < 0.15:
+        return rng.randint(-(1 << 31), 1 << 31)
+    if kind < 0.25:
+        return round(rng.uniform(-1e6, 1e6), rng.randint(0, 8))
+    if kind < 0.3:
+        return rng.choice([True, False, None])
+    if kind < 0.6:
+        return ' '.join(identifier(rng) for _ in range(rng.randint(1, 8)))
+    if kind < 0.8:
+        return [json_value(rng, depth + 1) for _ in range(rng.randint(0, 6))]
+    return {identifier(rng): json_value(rng, depth + 1) for _ in range(rng.randint(1, 8))}
+
+
+def json_documents(rng: random.Random) -> Iterator[str]:
+    # nested documents, alternately pretty-printed and compact with escaped non-ascii
+    while True:
+        document = {identifier(rng): json_value(rng, 0) for _ in range(rng.randint(2, 12))}
+        if rng.random() < 0.5:
+            yield json.dumps(document, indent=rng.choice([2, 4]), ensure_ascii=False) + '\n'
+        else:
+            yield json.dumps(document, separators=(',', ':')) + '\n'
+
+
+def whitespace_runs(rng: random.Random) -> Iterator[str]:
+    # words separated by runs of spaces, tabs and line breaks of up to 10k characters
+    while True:
+        yield identifier(rng)
+        yield ''.join(rng.choices(' \t\n\r', weights=[8, 2, 1, 0.2], k=log_uniform(rng, 1, 10_000)))
+
+
+def digit_runs(rng: random.Random) -> Iterator[str]:
+    # runs of digits of up to 10k characters, plain or with separators, between words
+    while True:
+        digits = ''.join(rng.choices('0123456789', k=log_uniform(rng, 1, 10_000)))
+        if rng.random() < 0.2:
+            digits = ','.join(digits[i : i + 3] for i in range(0, len(digits), 3))
+        yield f'{identifier(rng)} {digits}{rng.choice([" ", ".", "\n", "px ", "e-"])}'
+
+
+emoji_bases = [
+    '\U0001f468',
+    '\U0001f469',
+    '\U0001f467',
+    '\U0001f466',
+    '\u2764',
+    '\U0001f3f3',
+    '\U0001f9d1',
+    '\U0001f600',
+    '\U0001f44d',
+    '\U0001f308',
+    '\U0001f52c',
+    '\U0001f680',
+]
+
+
+def emoji(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.15:
+        # flags of regional indicator pairs
+        return ''.join(chr(0x1F1E6 + rng.randrange(26)) for _ in range(2))
+    if kind < 0.25:
+        # keycaps
+        return f'{rng.choice("0123456789#*")}\ufe0f\u20e3'
+    parts = []
+    for _ in range(rng.randint(1, 5)):
+        part = rng.choice(emoji_bases)
+        if rng.random() < 0.3:
+            part += chr(0x1F3FB + rng.randrange(5))
+        elif rng.random() < 0.3:
+            part += '\ufe0f'
+        parts.append(part)
+    return '\u200d'.join(parts)
+
+
+def emoji_sequences(rng: random.Random) -> Iterator[str]:
+    # zero width joiner sequences with skin tones and variation selectors, flags and keycaps, within text
+    while True:
+        yield ''.join(emoji(rng) for _ in range(rng.randint(1, 20)))
+        yield rng.choice([' ', '', '\n', f' {identifier(rng)} '])
+
+
+scripts = [
+    (0x0041, 0x005A),
+    (0x0061, 0x007A),
+    (0x00C0, 0x00FF),
+    (0x0391, 0x03C9),
+    (0x0410, 0x044F),
+    (0x05D0, 0x05EA),
+    (0x0627, 0x064A),
+    (0x0905, 0x0939),
+    (0x0E01, 0x0E2E),
+    (0x3041, 0x3096),
+    (0x30A1, 0x30FA),
+    (0x4E00, 0x9FA5),
+    (0xAC00, 0xD7A3),
+]
+
+
+def mixed_scripts(rng: random.Random) -> Iterator[str]:
+    # words of different scripts, some switching script or carrying combining marks within the word
+    while True:
+        words = []
+        for _ in range(rng.randint(5, 40)):
+            word = ''
+            for _ in range(2 if rng.random() < 0.2 else 1):
+                low, high = rng.choice(scripts)
+                word += ''.join(chr(rng.randint(low, high)) for _ in range(rng.randint(1, 10)))
+            if rng.random() < 0.1:
+                word += chr(rng.randint(0x0300, 0x036F))
+            words.append(word)
+        yield ' '.join(words) + rng.choice(['. ', '\n', '\u3002', '! '])
+
+
+def no_whitespace(rng: random.Random) -> Iterator[str]:
+    # blobs of up to 1M characters without whitespace, like base64, minified text and long words
+    alphabets = [
+        'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=',
+        'abcdefghijklmnopqrstuvwxyz',
+        '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~',
+        ''.join(chr(c) for c in range(0x3041, 0x3097)),
+        ''.join(chr(c) for c in range(0x4E00, 0x4F00)),
+    ]
+    while True:
+        alphabet = rng.choice([*alphabets, ''.join(alphabets)])
+        yield ''.join(rng.choices(alphabet, k=log_uniform(rng, 1_000, 1_000_000))) + '\n'
+
+
+generators: OrderedDict[str, Callable[[random.Random], Iterator[str]]] = OrderedDict([
+    ('code', code),
+    ('json', json_documents),
+    ('whitespace runs', whitespace_runs),
+    ('digit runs', digit_runs),
+    ('emoji', emoji_sequences),
+    ('mixed scripts', mixed_scripts),
+    ('no whitespace', no_whitespace),
+])  # fmt: skip
+
+
+def synthetic_label(name: str, size: int, seed: int) -> str:
+    # dataset name used in benchmark names, with the size and seed the corpus was generated with
+    return f'{name} {format_size(size)}' + (f' seed {seed}' if seed != 0 else '')
+
+
+def synthetic_corpus(generator: str, size: int, seed: int, directory: str = 'data/generated') -> str:
+    # generates size bytes of the corpus once and caches it, the output only depends on the arguments
+    name = generator.replace(' ', '_')
+    output = os.path.join(directory, f'synthetic-{name}-{format_size(size)}-seed{seed}-v{version}.txt')
+    if os.path.isfile(output):
+        return output
+    rng = random.Random(f'{generator}:{seed}')  # noqa: S311
+    chunks = []
+    written = 0
+    for chunk in generators[generator](rng):
+        data = chunk.encode('utf-8')
+        chunks.append(data)
+        written += len(data)
+        if written >= size:
+            break
+    # cut at the last complete character
+    data = b''.join(chunks)[:size].decode('utf-8', errors='ignore').encode('utf-8')
+    os.makedirs(directory, exist_ok=True)
+    partial = f'{output}.partial'
+    with open(partial, 'wb') as f:
+        f.write(data)
+    os.replace(partial, output)
+    return output
@@ -1,7 +1,13 @@
+from .histogram import LatencyHistogram, format_duration
+from .memory import format_bytes, memory_usage, reset_peak
+from .perf import PerfCounters, derived_metrics, open_counters
+from .profiler import SamplingProfiler
+from .results import ResultsStore
+
 import os
 import time
 
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
 from math import ceil, floor
 from typing import Any, Optional
 
@@ -13,17 +19,38 @@ from rich.progress import BarColumn, Progress, TextColumn
 from rich.theme import Theme
 
 
+significance_tests = {'mannwhitney': 'Mann-Whitney U', 'welch': 'Welch t-test'}
+
+latency_percentiles = [50, 90, 99, 99.9, 100]
+
+
 class Timings:
     name: str
     timings: list[float]
+    work: dict[str, float]
+    stats: dict[str, float]
+    params: dict[str, Any]
+    memory: dict[str, float]
+    counters: dict[str, float]
+    latencies: LatencyHistogram
+    run_id: str | None
     summary_fmt: str
     iters_fmt: str
 
+    alpha: float = 0.05
+    test: str = 'mannwhitney'
     console = Console(theme=Theme(inherit=False))
 
     def __init__(self: 'Timings', name: str) -> None:
         self.name = name or 'Timing'
         self.timings = []
+        self.work = {}
+        self.stats = {}
+        self.params = {}
+        self.memory = {}
+        self.counters = {}
+        self.latencies = LatencyHistogram()
+        self.run_id = None
         self.summary_fmt = (
             '\t[magenta]time: [/]\\[ [dim]{p0:.5f}s[/]  [bold]{avg:.5f}s[/]  [dim]{p100:.5f}s[/]]\n'
             '\t[dim]med: [/][dim]{med:.5f}s[/] [dim]mod: [/][dim]{mod:.5f}s[/] '
@@ -31,9 +58,9 @@ class Timings:
         )
 
     @staticmethod
-    def from_dir(name: str, directory: str) -> 'Timings':
+    def from_dir(name: str, directory: str, run_id: str | None = None) -> 'Timings':
         t = Timings(name)
-        t.load_timings(directory)
+        t.load_timings(directory, run_id)
         return t
 
     def print_timings(self: 'Timings') -> None:
@@ -50,6 +77,59 @@ class Timings:
             sum=self.sum(),
             **{f'p{i}': self.percentile(i) for i in range(0, 101, 10)},
         )
+        if len(self.timings) > 1:
+            med_low, med_high = self.confidence_interval(np.median)
+            avg_low, avg_high = self.confidence_interval(np.mean)
+            s += (
+                f'\n\t[dim]ci{(1 - self.alpha) * 100:g}: med: \\[{med_low:.5f}s, {med_high:.5f}s] '
+                f'avg: \\[{avg_low:.5f}s, {avg_high:.5f}s][/]'
+            )
+        rates = self.rates()
+        if 'MB/s' in rates:
+            s += (
+                f'\n\t[magenta]thrpt: [/]\\[ [dim]{self.rates(self.percentile(0))["MB/s"]:.3f}[/]  '
+                f'[bold]{rates["MB/s"]:.3f}[/]  [dim]{self.rates(self.percentile(100))["MB/s"]:.3f}[/]] MB/s'
+            )
+        if len(rates) > 0:
+            s += (
+                '\n\t[magenta]rate: [/]\\[ '
+                + '  '.join(f'[bold]{rate:,.1f}[/] [dim]{unit}[/]' for unit, rate in rates.items() if unit != 'MB/s')
+                + ' ]'
+            )
+        if len(self.stats) > 0:
+            s += (
+                '\n\t[magenta]stats: [/]\\[ '
+                + '  '.join(f'[bold]{value:,.3f}[/] [dim]{stat}[/]' for stat, value in self.stats.items())
+                + ' ]'
+            )
+        if len(self.memory) > 0:
+            s += (
+                '\n\t[magenta]mem: [/]\\[ '
+                + '  '.join(f'[bold]{format_bytes(value)}[/] [dim]{kind}[/]' for kind, value in self.memory.items())
+                + ' ]'
+            )
+        if self.latencies.count() > 0:
+            s += (
+                '\n\t[magenta]lat: [/]\\[ '
+                + '  '.join(
+                    f'[bold]{format_duration(self.latencies.percentile(p))}[/] [dim]p{p:g}[/]'
+                    for p in latency_percentiles
+                )
+                + f' ] [dim]{self.latencies.count():,} requests[/]'
+                + '\n\t[magenta]hist: [/]\\[ '
+                + '  '.join(
+                    f'[dim]<{format_duration(bound)}[/] {count / self.latencies.count() * 100:.1f}%'
+                    for bound, count in self.latencies.octaves()
+                )
+                + ' ]'
+            )
+        metrics = derived_metrics(self.counters, self.work)
+        if len(metrics) > 0:
+            s += (
+                '\n\t[magenta]perf: [/]\\[ '
+                + '  '.join(f'[bold]{value:,.3f}[/] [dim]{metric}[/]' for metric, value in metrics.items())
+                + ' ]'
+            )
         self.console.print(s)
 
     def print_timings_compare(self: 'Timings', other: 'Timings') -> None:
@@ -64,46 +144,48 @@ class Timings:
         avg_diff_percent = avg_diff / other.avg() * 100
         p100_diff = self.percentile(100) - other.percentile(100)
         p100_diff_percent = p100_diff / other.percentile(100) * 100
+        pvalue = self.pvalue(other)
+        significant = pvalue < self.alpha
         s = '  [dim]compared to [italic]{other_name}[/]:[/]\n'
         t = '\t[dim]time: [/]\\['
         d = '\t[dim]diff: [/]\\['
         if p0_diff >= 0:
-            if p0_diff_percent > 1.5:
+            if significant:
                 t += '[dim red]+{p0:.5f}s[/] '
                 d += '[dim red]+{p0_diff_percent: >7.3f}%[/] '
             else:
                 t += '[dim]+{p0:.5f}s[/] '
                 d += '[dim]+{p0_diff_percent: >7.3f}%[/] '
         else:
-            if p0_diff_percent < -1.5:
+            if significant:
                 t += '[dim green]{p0:.5f}s[/] '
                 d += '[dim green]-{p0_diff_percent: >7.3f}%[/] '
             else:
                 t += '[dim]{p0:.5f}s[/] '
                 d += '[dim]-{p0_diff_percent: >7.3f}%[/] '
         if avg_diff >= 0:
-            if avg_diff_percent > 1.5:
+            if significant:
                 t += '[bold red]+{avg:.5f}s[/] '
                 d += '[red]+{avg_diff_percent: >7.3f}%[/] '
             else:
                 t += '[white]+{avg:.5f}s[/] '
                 d += '[white]+{avg_diff_percent: >7.3f}%[/] '
         else:
-            if avg_diff_percent < -1.5:
+            if significant:
                 t += '[bold green]{avg:.5f}s[/] '
                 d += '[green]-{avg_diff_percent: >7.3f}%[/] '
             else:
                 t += '[white]{avg:.5f}s[/] '
                 d += '[white]-{avg_diff_percent: >7.3f}%[/] '
         if p100_diff >= 0:
-            if p100_diff_percent > 1.5:
+            if significant:
                 t += '[dim red]+{p100:.5f}s[/]'
                 d += '[dim red]+{p100_diff_percent: >7.3f}%[/]'
             else:
                 t += '[dim]+{p100:.5f}s[/]'
                 d += '[dim]+{p100_diff_percent: >7.3f}%[/]'
         else:
-            if p100_diff_percent < -1.5:
+            if significant:
                 t += '[dim green]{p100:.5f}s[/]'
                 d += '[dim green]-{p100_diff_percent: >7.3f}%[/]'
             else:
@@ -111,7 +193,15 @@ class Timings:
                 d += '[dim]-{p100_diff_percent: >7.3f}%[/]'
         t += ']'
         d += ']'
-        s += t + '\n' + d
+        s += t + '\n' + d + '\n'
+        s += '\t[dim]test: [/]\\[[dim]{test} p={pvalue:.4f}[/] '
+        if not significant:
+            s += '[white]not significant[/]'
+        elif avg_diff >= 0:
+            s += '[red]significantly slower[/]'
+        else:
+            s += '[green]significantly faster[/]'
+        s += ' [dim]at alpha={alpha}[/]]'
         self.console.print(
             s.format(
                 name=self.name,
@@ -122,22 +212,80 @@ class Timings:
                 p0_diff_percent=abs(p0_diff_percent),
                 avg_diff_percent=abs(avg_diff_percent),
                 p100_diff_percent=abs(p100_diff_percent),
+                test=significance_tests[self.test],
+                pvalue=pvalue,
+                alpha=self.alpha,
             )
         )
+        rates = self.rates()
+        other_rates = other.rates()
+        units = [unit for unit in rates if other_rates.get(unit)]
+        if len(units) > 0:
+            r = '\t[dim]rate: [/]\\['
+            for unit in units:
+                diff_percent = (rates[unit] - other_rates[unit]) / other_rates[unit] * 100
+                better = diff_percent < 0 if unit.startswith('ns/') else diff_percent > 0
+                color = 'white' if not significant else 'green' if better else 'red'
+                r += f' [{color}]{diff_percent:+.3f}%[/] [dim]{unit}[/]'
+            self.console.print(r + ' ]')
+        kinds = [kind for kind in self.memory if other.memory.get(kind)]
+        if len(kinds) > 0:
+            # memory is measured once per run, so differences are shown without a significance test
+            m = '\t[dim]mem: [/]\\['
+            for kind in kinds:
+                diff_percent = (self.memory[kind] - other.memory[kind]) / other.memory[kind] * 100
+                m += f' {diff_percent:+.3f}% [dim]{kind}[/]'
+            self.console.print(m + ' ]')
+        if self.latencies.count() > 0 and other.latencies.count() > 0:
+            # latency percentiles are compared without a significance test
+            lat = '\t[dim]lat: [/]\\['
+            for p in latency_percentiles:
+                other_value = other.latencies.percentile(p)
+                if other_value > 0:
+                    diff_percent = (self.latencies.percentile(p) - other_value) / other_value * 100
+                    lat += f' {diff_percent:+.3f}% [dim]p{p:g}[/]'
+            self.console.print(lat + ' ]')
+        metrics = derived_metrics(self.counters, self.work)
+        other_metrics = derived_metrics(other.counters, other.work)
+        names = [metric for metric in metrics if other_metrics.get(metric)]
+        if len(names) > 0:
+            # counters are averaged over the iterations, so differences are shown without a significance test
+            c = '\t[dim]perf: [/]\\['
+            for metric in names:
+                diff_percent = (metrics[metric] - other_metrics[metric]) / other_metrics[metric] * 100
+                c += f' {diff_percent:+.3f}% [dim]{metric}[/]'
+            self.console.print(c + ' ]')
 
     def write_timings(self: 'Timings', output_dir: str) -> None:
         if len(self.timings) == 0:
             return
-        tms = list(self.timings)
-        os.makedirs(output_dir, exist_ok=True)
-        with open(f'{output_dir}/{self.name}.txt', 'w', encoding='utf8', newline='\n') as f:
-            f.write('\n'.join(str(t) for t in tms))
-            f.write('\n')
+        ResultsStore(output_dir).append(
+            self.name,
+            list(self.timings),
+            self.work,
+            self.stats,
+            self.params,
+            self.memory,
+            self.counters,
+            self.latencies.to_list(),
+        )
 
-    def load_timings(self: 'Timings', output_dir: str) -> None:
+    def load_timings(self: 'Timings', output_dir: str, run_id: str | None = None) -> None:
         if not os.path.isdir(output_dir):
             return
-        if not os.path.isfile(f'{output_dir}/{self.name}.txt'):
+        record = ResultsStore(output_dir).latest(self.name, run_id)
+        if record is not None:
+            self.timings.extend(record['timings'])
+            self.work = record['work']
+            self.stats = record['stats']
+            self.params = record['params']
+            self.memory = record['memory']
+            self.counters = record['counters']
+            self.latencies = LatencyHistogram.from_list(record['latencies'])
+            self.run_id = record['run_id']
+            return
+        # fall back to timings written before the results store was introduced
+        if run_id is not None or not os.path.isfile(f'{output_dir}/{self.name}.txt'):
             return
         with open(f'{output_dir}/{self.name}.txt', encoding='utf8', newline='\n') as f:
             for line in f.readlines():
@@ -191,6 +339,52 @@ class Timings:
             return 0
         return float(np.percentile(list(self.timings), p))
 
+    def confidence_interval(self: 'Timings', statistic: Callable[..., Any]) -> tuple[float, float]:
+        if len(self.timings) < 2:
+            value = float(statistic(list(self.timings))) if len(self.timings) > 0 else 0
+            return value, value
+        result = sp.stats.bootstrap(
+            (np.array(self.timings),),
+            statistic,
+            confidence_level=1 - self.alpha,
+            n_resamples=2000,
+            method='percentile',
+            rng=np.random.default_rng(0),
+        )
+        return float(result.confidence_interval.low), float(result.confidence_interval.high)
+
+    def pvalue(self: 'Timings', other: 'Timings') -> float:
+        if len(self.timings) < 2 or len(other.timings) < 2:
+            return 1.0
+        if self.test == 'welch':
+            result = sp.stats.ttest_ind(self.timings, other.timings, equal_var=False)
+        else:
+            result = sp.stats.mannwhitneyu(self.timings, other.timings, alternative='two-sided')
+        pvalue = float(result.pvalue)
+        return pvalue if not np.isnan(pvalue) else 1.0
+
+    def rates(self: 'Timings', seconds: float | None = None) -> dict[str, float]:
+        if seconds is None:
+            seconds = self.avg()
+        if seconds == 0:
+            return {}
+        rates: dict[str, float] = {}
+        for unit, amount in self.work.items():
+            if unit == 'bytes':
+                rates['MB/s'] = amount / seconds / 1_000_000
+            else:
+                rates[f'{unit}/s'] = amount / seconds
+        if self.work.get('tokens'):
+            rates['ns/token'] = seconds / self.work['tokens'] * 1_000_000_000
+        return rates
+
+    def relative_ci_halfwidth(self: 'Timings') -> float:
+        if len(self.timings) < 2 or self.avg() == 0:
+            return float('inf')
+        n = len(self.timings)
+        sem = float(np.std(list(self.timings), ddof=1)) / np.sqrt(n)
+        return float(sp.stats.t.ppf(1 - self.alpha / 2, n - 1) * sem / self.avg())
+
     def push(self: 'Timings', value: float) -> None:
         self.timings.append(value)
 
@@ -204,6 +398,28 @@ class Timings:
         return i in self.timings
 
 
+def configure(
+    show_progress: bool | None = None,
+    alpha: float | None = None,
+    test: str | None = None,
+    adaptive: dict[str, float] | None = None,
+    perf_counters: bool | None = None,
+    profile_dir: str | None = None,
+) -> None:
+    if show_progress is not None:
+        BenchmarkTimer.show_progress = show_progress
+    if alpha is not None:
+        Timings.alpha = alpha
+    if test is not None:
+        Timings.test = test
+    if adaptive is not None:
+        BenchmarkTimer.adaptive = adaptive
+    if perf_counters is not None:
+        BenchmarkTimer.perf_counters = perf_counters
+    if profile_dir is not None:
+        BenchmarkTimer.profile_dir = profile_dir
+
+
 class BenchmarkTimer:
     _timer: Timings
     _last_timer: Timings | None
@@ -213,6 +429,19 @@ class BenchmarkTimer:
     _last_unprinted_tmi: Optional['TimingIteration']
     _used: bool
     _output_dir: str
+    _repeat: int
+    _measure_memory: bool
+    _memory_baseline: dict[str, int] | None
+    _memory_loaded: dict[str, int] | None
+    _perf: PerfCounters | None
+    _counters: dict[str, list[float]]
+    _profiler: SamplingProfiler | None
+    show_progress: bool = True
+    adaptive: dict[str, float] | None = None
+    perf_counters: bool = False
+    perf_unavailable_reported: bool = False
+    # writes a sampled profile of the timed iterations of each benchmark to this directory
+    profile_dir: str | None = None
     console = Console(theme=Theme(inherit=False))
 
     def __init__(
@@ -221,8 +450,17 @@ class BenchmarkTimer:
         print_summary: bool = True,
         output_dir: str = 'timings',
         compare_dir: str | None = None,
+        repeat: int = 10,
+        measure_memory: bool = True,
     ) -> None:
         self._timer = Timings(name=name)
+        self._repeat = repeat
+        self._measure_memory = measure_memory
+        self._memory_baseline = None
+        self._memory_loaded = None
+        self._perf = None
+        self._counters = {}
+        self._profiler = None
         self._name = name
         self._print_summary = print_summary
         self._last_unprinted_tmi = None
@@ -241,52 +479,87 @@ class BenchmarkTimer:
 
     class TimingIteration:
         def __init__(
-            self: 'BenchmarkTimer.TimingIteration', timer: 'BenchmarkTimer', i: int, is_warmup: bool = False
+            self: 'BenchmarkTimer.TimingIteration',
+            timer: 'BenchmarkTimer',
+            i: int,
+            is_warmup: bool = False,
+            repeat: int | None = None,
         ) -> None:
             self._timer = timer
             self.i = i
+            self.repeat = repeat or timer._repeat
             self.start_time = None
             self.end_time = None
             self.is_warmup = is_warmup
 
         def __enter__(self: 'BenchmarkTimer.TimingIteration') -> None:
+            if self._timer._profiler is not None and not self.is_warmup:
+                self._timer._profiler.start()
+            if self._timer._perf is not None:
+                self._timer._perf.start()
             self.start_time = time.perf_counter()
 
         def __exit__(self: 'BenchmarkTimer.TimingIteration', exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
             self.end_time = time.perf_counter()
+            counts = self._timer._perf.stop() if self._timer._perf is not None else {}
+            if self._timer._profiler is not None:
+                self._timer._profiler.stop()
             if exc_type is None:
                 if not self.is_warmup:
-                    self._timer._timer.push(self.total_seconds())
+                    # normalize to the default number of repetitions so timings stay comparable
+                    self._timer._timer.push(self.total_seconds() * self._timer._repeat / self.repeat)
+                    for counter, count in counts.items():
+                        self._timer._counters.setdefault(counter, []).append(count * self._timer._repeat / self.repeat)
             else:
                 self._timer.console.print(
-                    f'\n[yellow]Cancelled iteration {self.i}{
-                        " (warmup)" if self.is_warmup else ""} after {self.total_seconds():.5}s[/]'
+                    f'\n[yellow]Cancelled iteration {self.i}{" (warmup)" if self.is_warmup else ""} after {
+                        self.total_seconds():.5}s[/]'
                 )
                 raise exc_val
 
+        def record_latencies(self: 'BenchmarkTimer.TimingIteration', latencies_ns: list[int]) -> None:
+            # latencies of the individual operations of the iteration, excluding warmup iterations
+            if not self.is_warmup:
+                self._timer._timer.latencies.record(np.array(latencies_ns, dtype=np.int64))
+
         def total_seconds(self: 'BenchmarkTimer.TimingIteration') -> float:
             return (self.end_time or 0) - (self.start_time or 0)
 
-    def iterations(self: 'BenchmarkTimer', n: int = 100, warmup: int = 10) -> Iterator['TimingIteration']:
+    def iterations(
+        self: 'BenchmarkTimer', n: int = 100, warmup: int = 10, adaptive: dict[str, float] | None = None
+    ) -> Iterator['TimingIteration']:
         assert not self._used
         self._used = True
+        if self._measure_memory:
+            # the tokenizer is loaded between entering the timer and starting the iterations
+            self._memory_loaded = memory_usage()
+            self._timer.params.update(memory_peak_reset=reset_peak())
+        if self.perf_counters:
+            self.open_counters()
+        if self.profile_dir:
+            self._profiler = SamplingProfiler()
+        adaptive = adaptive or self.adaptive
+        if adaptive:
+            yield from self.adaptive_iterations(n, adaptive)
+            return
+        self._timer.params.update(iterations=n, warmup=warmup, repeat=self._repeat)
         try:
             p = BarColumn()
             t = TextColumn('{task.fields[avg]}', justify='left')
-            with Progress(p, t, transient=True, auto_refresh=False) as progress:
+            with Progress(p, t, transient=True, auto_refresh=False, disable=not self.show_progress) as progress:
                 task = progress.add_task(
                     f'{self._name}', total=(ceil(n / 5) + 1), avg=f'[dim]warming up: 1/{warmup}[/dim]'
                 )
                 progress.refresh()
                 for i in range(n + warmup):
                     if i < warmup:
-                        progress.tasks[task].fields['avg'] = f'[dim]warming up: {
-                            i + 1}/{warmup}[/dim]'
+                        progress.tasks[task].fields['avg'] = f'[dim]warming up: {i + 1}/{warmup}[/dim]'
                         progress.refresh()
                     if floor((i - warmup) % 5) == 0 and i >= warmup:
                         progress.advance(task, 1)
-                        progress.tasks[task].fields['avg'] = f'[dim]avg: {self._timer.avg():.5f}s sum: {
-                                self._timer.sum():.5f}s[/dim]'
+                        progress.tasks[task].fields['avg'] = (
+                            f'[dim]avg: {self._timer.avg():.5f}s sum: {self._timer.sum():.5f}s[/dim]'
+                        )
                         progress.refresh()
                     self._last_unprinted_tmi = self.TimingIteration(self, i, i < warmup)
                     yield self._last_unprinted_tmi
@@ -296,23 +569,146 @@ class BenchmarkTimer:
             # caused here by manually interrupting the benchmark
             pass
 
+    def adaptive_iterations(self: 'BenchmarkTimer', n: int, settings: dict[str, float]) -> Iterator['TimingIteration']:
+        target_time = settings.get('target_time', 0.5)
+        ci_threshold = settings.get('ci_threshold', 0.01)
+        time_budget = settings.get('time_budget', 300)
+        max_warmup = int(settings.get('max_warmup', 30))
+        min_iterations = int(settings.get('min_iterations', 5))
+        window = 3
+        started = time.perf_counter()
+        params = self._timer.params
+        params.update(adaptive=True, target_time=target_time, ci_threshold=ci_threshold, time_budget=time_budget)
+        try:
+            p = BarColumn()
+            t = TextColumn('{task.fields[avg]}', justify='left')
+            with Progress(p, t, transient=True, auto_refresh=False, disable=not self.show_progress) as progress:
+                task = progress.add_task(f'{self._name}', total=n, avg='[dim]warming up: 1[/dim]')
+                progress.refresh()
+                # warm up with single repetitions until the mean of the last window stops changing
+                warmup_times: list[float] = []
+                while True:
+                    self._last_unprinted_tmi = self.TimingIteration(self, len(warmup_times), True, 1)
+                    yield self._last_unprinted_tmi
+                    warmup_times.append(self._last_unprinted_tmi.total_seconds())
+                    progress.tasks[task].fields['avg'] = f'[dim]warming up: {len(warmup_times) + 1}[/dim]'
+                    progress.refresh()
+                    if len(warmup_times) >= 2 * window:
+                        last = float(np.mean(warmup_times[-window:]))
+                        previous = float(np.mean(warmup_times[-2 * window : -window]))
+                        if previous > 0 and abs(last - previous) / previous < 0.02:
+                            params.update(warmup_converged=True)
+                            break
+                    if len(warmup_times) >= max_warmup or time.perf_counter() - started > time_budget / 4:
+                        params.update(warmup_converged=False)
+                        break
+                # size the inner loop so a timing iteration takes about the target duration
+                per_repeat = float(np.median(warmup_times[-window:]))
+                repeat = max(1, round(target_time / per_repeat)) if per_repeat > 0 else 1
+                params.update(warmup=len(warmup_times), repeat=repeat, iterations=0, stop_reason='max iterations')
+                for i in range(n):
+                    self._last_unprinted_tmi = self.TimingIteration(self, len(warmup_times) + i, False, repeat)
+                    yield self._last_unprinted_tmi
+                    halfwidth = self._timer.relative_ci_halfwidth()
+                    params.update(iterations=len(self._timer), ci_halfwidth=halfwidth)
+                    progress.advance(task, 1)
+                    progress.tasks[task].fields['avg'] = (
+                        f'[dim]avg: {self._timer.avg():.5f}s ci: ±{halfwidth * 100:.2f}% repeat: {repeat}[/dim]'
+                    )
+                    progress.refresh()
+                    if len(self._timer) >= min_iterations and halfwidth < ci_threshold:
+                        params.update(stop_reason='converged')
+                        break
+                    if time.perf_counter() - started > time_budget:
+                        params.update(stop_reason='time budget')
+                        break
+        except ImportError:
+            # caused here by manually interrupting the benchmark
+            pass
+
+    @property
+    def timings(self: 'BenchmarkTimer') -> Timings:
+        return self._timer
+
+    def record_timings(self: 'BenchmarkTimer', timings: list[float], warmup: int = 0) -> None:
+        # for iterations measured elsewhere, e.g. in a separate process
+        assert not self._used
+        self._used = True
+        self._timer.params.update(iterations=len(timings), warmup=warmup, repeat=self._repeat)
+        for timing in timings:
+            self._timer.push(timing)
+
+    def record_work(self: 'BenchmarkTimer', **work: float) -> None:
+        self._timer.work.update(work)
+
+    def record_stats(self: 'BenchmarkTimer', **stats: float) -> None:
+        self._timer.stats.update(stats)
+
+    def open_counters(self: 'BenchmarkTimer') -> None:
+        self._perf = open_counters()
+        self._timer.params.update(perf_counters=self._perf is not None)
+        if self._perf is None and not BenchmarkTimer.perf_unavailable_reported:
+            BenchmarkTimer.perf_unavailable_reported = True
+            self.console.print('[yellow]Hardware performance counters are unavailable, continuing without them[/]')
+
+    def record_counters(self: 'BenchmarkTimer') -> None:
+        if self._perf is None:
+            return
+        self._perf.close()
+        self._perf = None
+        for counter, counts in self._counters.items():
+            self._timer.counters[counter] = float(np.mean(counts))
+
+    def write_profile(self: 'BenchmarkTimer') -> None:
+        if self._profiler is None or self.profile_dir is None:
+            return
+        path = os.path.join(self.profile_dir, f'{self._name}.folded')
+        self._profiler.write(path)
+        self._profiler = None
+        self.console.print(f'[dim]Profile written to {path}[/]')
+
+    def record_memory(self: 'BenchmarkTimer') -> None:
+        if self._memory_baseline is None or self._memory_loaded is None:
+            return
+        steady = memory_usage()
+        memory = self._timer.memory
+        if 'rss' in self._memory_baseline and 'rss' in self._memory_loaded:
+            memory.update(baseline=self._memory_baseline['rss'], loaded=self._memory_loaded['rss'])
+        if 'peak' in self._memory_loaded:
+            memory.update({'load peak': self._memory_loaded['peak']})
+        if 'peak' in steady:
+            memory.update(peak=steady['peak'])
+        if 'rss' in steady:
+            memory.update(steady=steady['rss'])
+        if 'uss' in steady:
+            memory.update(uss=steady['uss'])
+        if 'baseline' in memory:
+            memory.update(model=memory['loaded'] - memory['baseline'])
+
     def __enter__(self: 'BenchmarkTimer') -> 'BenchmarkTimer':
-        if self._print_summary:
+        if self._measure_memory:
+            self._memory_baseline = memory_usage()
+            reset_peak()
+        if self._print_summary and self.show_progress:
             self.console.print(f'[blue bold]{self._name}[/][bold dim]...[/]')
         return self
 
     def __exit__(self: 'BenchmarkTimer', exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
         if exc_type is not None:
-            self.console.print(
-                f'[yellow]Cancelled benchmark {self._name} after {
-                    len(self._timer)} iterations[/]'
-            )
+            self.console.print(f'[yellow]Cancelled benchmark {self._name} after {len(self._timer)} iterations[/]')
+        self.record_memory()
+        self.record_counters()
+        # timings measured under the profiler are slowed down by sampling, so they are not stored
+        profiled = self._profiler is not None
+        self.write_profile()
+        if not self.show_progress:
+            self.console.print(f'[blue bold]{self._name}[/]')
         self._timer.print_timings()
         if self._last_timer:
             self._timer.print_timings_compare(self._last_timer)
         if self._compare:
             self._timer.print_timings_compare(self._compare)
-        if exc_type is None and self._output_dir:
+        if exc_type is None and self._output_dir and not profiled:
             self._timer.write_timings(self._output_dir)
         if exc_type is not None:
             raise exc_val
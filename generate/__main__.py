@@ -1,13 +1,17 @@
+from bench.utils.adapter import adapters
+
 from . import __version__
+from .utils.compare import Comparison, compare_outputs
+from .utils.outputs import check_model, gen_model, init_worker, load_inputs, load_manifest, write_manifest
 
 import argparse
-import glob
+import functools
 import logging
 import os
 
 from collections.abc import Callable
-from pathlib import Path
-from typing import cast
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any
 
 from rich.console import Console
 from rich.logging import RichHandler
@@ -30,6 +34,38 @@ if __name__ == '__main__':
         formatter_class=RichHelpFormatter,
     )
     argparser.add_argument('--log-level', type=str, help='Log level. (default: INFO)', default='INFO')
+    argparser.add_argument(
+        '--jobs',
+        '-j',
+        type=int,
+        help='Number of models to generate outputs for at the same time. (default: number of cores)',
+        default=os.cpu_count() or 1,
+    )
+    argparser.add_argument(
+        '--force',
+        action=argparse.BooleanOptionalAction,
+        help='Regenerate outputs even if the model, inputs and library version did not change. (default: False)',
+        default=False,
+    )
+    argparser.add_argument(
+        '--check',
+        action=argparse.BooleanOptionalAction,
+        help='Encode with the installed libraries and compare with the stored outputs instead of writing them. '
+        '(default: False)',
+        default=False,
+    )
+    argparser.add_argument(
+        '--text',
+        action=argparse.BooleanOptionalAction,
+        help='Also write token outputs as text besides the binary format. (default: False)',
+        default=False,
+    )
+    argparser.add_argument(
+        '--compare',
+        action=argparse.BooleanOptionalAction,
+        help='Compare the outputs of libraries implementing the same model after generating them. (default: False)',
+        default=False,
+    )
     argparser.add_argument('--help', '-h', action='help', help='Show this help message and exit.')
     args = argparser.parse_args()
     console.print('[dim]Arguments:[/dim]', vars(args))
@@ -43,6 +79,11 @@ if __name__ == '__main__':
         )
         exit(1)
 
+    # verify jobs
+    if args.jobs < 1:
+        console.print(f'[red]Invalid number of jobs: [bold]{args.jobs}[/][/]')
+        exit(1)
+
     logging.basicConfig(
         level=args.log_level.upper(),
         format='[%(module)s] %(message)s',
@@ -52,227 +93,105 @@ if __name__ == '__main__':
 
     os.environ['TOKENIZERS_LOG'] = str.replace(args.log_level.lower(), 'critical', 'off').removesuffix('ing')
 
-    def gen_lines(
-        model: str, name: str, encode: Callable[[str], list[int]], decode: Callable[[list[int]], str]
-    ) -> None:
-        for data in ['small', 'mixed']:
-            text = open(f'data/{data}_input.txt', encoding='utf-8', newline='\n').read()
-            lines = text.strip('\n').split('\n')
-            lines_tokens = []
-            lines_decoded = []
-            for line_ in lines:
-                line = line_.rstrip()
-                if len(line) == 0:
-                    continue
-                line = line.replace('\\n', '\n').replace('\\s', ' ')
-                output = encode(line)
-                lines_tokens.append(', '.join([str(token) for token in output]))
-                lines_tokens.append('\n')
-                decoded = decode(output)
-                decoded = decoded.replace('\n', '\\n')
-                trailing_spaces = len(decoded) - len(decoded.rstrip())
-                decoded = decoded.rstrip() + ('\\s' * trailing_spaces)
-                if len(decoded) > 0:
-                    lines_decoded.append(decoded)
-                else:
-                    lines_decoded.append('\\x')
-            text_decoded = '\n'.join(lines_decoded) + '\n'
-            os.makedirs(f'outputs/{model}', exist_ok=True)
-            with open(f'outputs/{model}/{data}_tokens_{name}.txt', 'w', encoding='utf-8', newline='\n') as f:
-                f.writelines(lines_tokens)
-            if len(lines) != len(lines_decoded) or text != text_decoded:
-                logger.info(
-                    f'{model}: {name}: {data}_input.txt: {len(lines)} != {len(lines_decoded)} or lines not equal'
-                )
-                if len(lines) < 100:
-                    diff_between_text_and_decoded = [
-                        (i, text_line, decoded_line)
-                        for i, (text_line, decoded_line) in enumerate(zip(lines, lines_decoded, strict=False))
-                        if text_line != decoded_line
-                    ]
-                    if diff_between_text_and_decoded:
-                        logger.info('Differences between text and decoded:')
-                        for i, text_line, decoded_line in diff_between_text_and_decoded:
-                            logger.info(rf'{i}: {text_line!r} != {decoded_line!r}')
-                with open(f'outputs/{model}/{data}_output_{name}.txt', 'w', encoding='utf-8', newline='\n') as f:
-                    f.write(text_decoded)
-
-    def gen_full(
-        model: str,
-        name: str,
-        encode: Callable[
-            [str],
-            list[int],
-        ],
-        decode: Callable[[list[int]], str],
-    ) -> None:
-        for data in ['utf8']:
-            text = (
-                open(f'data/{data}_input.txt', encoding='utf-8', newline='\n')
-                .read()
-                .replace('\\n', '\n')
-                .replace('\\s', ' ')
-            )
-            output = encode(text)
-            decoded = decode(output)
-            os.makedirs(f'outputs/{model}', exist_ok=True)
-            with open(f'outputs/{model}/{data}_tokens_{name}.txt', 'w', encoding='utf-8', newline='\n') as f:
-                f.write(', '.join([str(token) for token in output]))
-            if len(decoded) != len(text) or text != decoded:
-                logger.info(f'{model}: {name}: {data}_input.txt: {len(text)} != {len(decoded)} or text not equal')
-                with open(f'outputs/{model}/{data}_output_{name}.txt', 'w', encoding='utf-8', newline='\n') as f:
-                    f.write(decoded)
-
     try:
-        # generate outputs for all models
-
-        def sentencepiece() -> None:
-            from sentencepiece import SentencePieceProcessor
-
-            models = glob.glob('models/tests/*.model')
-            for model in models:
-                console.print(f'[bold]{model}[/bold] [dim](sentencepiece)[/dim]')
-                name = os.path.basename(model).split('.')[0]
-                encoder: SentencePieceProcessor = SentencePieceProcessor()
-                encoder.Load(model)
-                gen_lines('sentencepiece', name, encoder.EncodeAsIds, encoder.Decode)
-                gen_full('sentencepiece', name, encoder.EncodeAsIds, encoder.Decode)
-
-        sentencepiece()
-
-        def tokenizers() -> None:
-            from tokenizers import Encoding, Tokenizer
-
-            models = glob.glob('models/tests/*.json')
-            for model in models:
-                name = os.path.basename(model).split('.')[0]
-                with open(model, encoding='utf-8') as f:
-                    text = f.read()
-                    if text.find('"version": "v3"') != -1:
-                        continue
-                console.print(f'[bold]{model}[/bold] [dim](tokenizers)[/dim]')
-                str.replace(text, '\n', '\\n')
-                encoder: Tokenizer = Tokenizer.from_file(model)
-                encoder.encode_special_tokens = False  # type: ignore
-                gen_lines(
-                    'tokenizers',
-                    name,
-                    lambda i, encoder=encoder: cast(Encoding, encoder.encode(i, add_special_tokens=False)).ids,
-                    lambda i, encoder=encoder: encoder.decode(i, skip_special_tokens=False),
-                )
-                gen_full(
-                    'tokenizers',
-                    name,
-                    lambda i, encoder=encoder: cast(Encoding, encoder.encode(i, add_special_tokens=False)).ids,
-                    lambda i, encoder=encoder: encoder.decode(i, skip_special_tokens=False),
-                )
-
-        tokenizers()
-
-        def kimi() -> None:
-            from vendor.kimi import TikTokenTokenizer
-
-            models = glob.glob('models/tests/*.kimi')
-            for model in models:
-                console.print(f'[bold]{model}[/bold] [dim](tokenizers)[/dim]')
-                name = os.path.basename(model).split('.')[0]
-                encoder: TikTokenTokenizer = TikTokenTokenizer(model)
-                encoder.encode_special_tokens = False  # type: ignore
-                gen_lines(
-                    'kimi',
-                    name,
-                    lambda i, encoder=encoder: encoder.encode(i, add_special_tokens=False),
-                    lambda i, encoder=encoder: encoder.decode(i, skip_special_tokens=False),
-                )
-                gen_full(
-                    'kimi',
-                    name,
-                    lambda i, encoder=encoder: encoder.encode(i, add_special_tokens=False),
-                    lambda i, encoder=encoder: encoder.decode(i, skip_special_tokens=False),
-                )
-
-        kimi()
-
-        def tiktoken() -> None:
-            from tiktoken import Encoding, get_encoding
-
-            models = glob.glob('models/tests/*.tiktoken')
-            for model in models:
-                console.print(f'[bold]{model}[/bold] [dim](tiktoken)[/dim]')
-                name = os.path.basename(model).split('.')[0]
-                encoder: Encoding = get_encoding(name)
-                gen_lines(
-                    'tiktoken',
-                    name,
-                    lambda i, encoder=encoder: encoder.encode(i, allowed_special='all'),
-                    encoder.decode,
-                )
-                gen_full('tiktoken', name, encoder.encode, encoder.decode)
-
-        tiktoken()
-
-        def meta() -> None:
-            from llama_models.llama4.tokenizer import Tokenizer
-
-            models = glob.glob('models/tests/*.meta')
-            for model in models:
-                console.print(f'[bold]{model}[/bold] [dim](meta)[/dim]')
-                name = os.path.basename(model).split('.')[0]
-                encoder: Tokenizer = Tokenizer(Path(model))
-                gen_lines(
-                    'meta',
-                    name,
-                    lambda i, encoder=encoder: encoder.encode(i, allowed_special='all', bos=False, eos=False),
-                    lambda i, encoder=encoder: encoder.decode(i),
-                )
-                gen_full(
-                    'meta',
-                    name,
-                    lambda i, encoder=encoder: encoder.encode(i, bos=False, eos=False),
-                    lambda i, encoder=encoder: encoder.decode(i),
-                )
-
-        meta()
-
-        def tekken() -> None:
-            from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
-
-            models = glob.glob('models/tests/*.json')
-            for model in models:
-                name = os.path.basename(model).split('.')[0]
-                with open(model, encoding='utf-8') as f:
-                    text = f.read()
-                    if text.find('"version": "v3"') == -1:
-                        continue
-                console.print(f'[bold]{model}[/bold] [dim](tekken)[/dim]')
-                str.replace(text, '\n', '\\n')
-                encoder = MistralTokenizer.from_file(model)
-                gen_lines(
-                    'tekken',
-                    name,
-                    lambda i, encoder=encoder: cast(
-                        list[int], encoder.instruct_tokenizer.tokenizer.encode(i, False, False)
-                    ),
-                    lambda i, encoder=encoder: encoder.decode(i),
-                )
-                gen_full(
-                    'tekken',
-                    name,
-                    lambda i, encoder=encoder: cast(
-                        list[int], encoder.instruct_tokenizer.tokenizer.encode(i, False, False)
-                    ),
-                    lambda i, encoder=encoder: encoder.decode(i),
-                )
-
-        # workaround for github.com/mistralai/mistral-common/pull/33
-        import builtins
-
-        open_ = builtins.open
-        builtins.open = lambda *args, **kwargs: open_(
-            *args, **{k: v for k, v in kwargs.items() if k != 'encoding'}, encoding='utf-8'
+        # generate outputs for all models of every tokenizer that has test models
+        jobs = [(tok, model) for tok, adapter_type in adapters().items() for model in adapter_type().test_models()]
+
+        def run_jobs(task: Callable[[str, str], Any], report: Callable[[str, str, Callable[[], Any]], bool]) -> int:
+            # runs the task for every model and returns the number of models it failed for
+            failed = 0
+            if args.jobs == 1:
+                for tok, model in jobs:
+                    failed += not report(tok, model, functools.partial(task, tok, model))
+            else:
+                # the inputs are read once and shared with the workers
+                with ProcessPoolExecutor(
+                    max_workers=args.jobs, initializer=init_worker, initargs=(load_inputs(),)
+                ) as executor:
+                    futures = {executor.submit(task, tok, model): (tok, model) for tok, model in jobs}
+                    for future in as_completed(futures):
+                        failed += not report(*futures[future], future.result)
+            return failed
+
+        if args.check:
+
+            def report_check(tok: str, model: str, result: Callable[[], str | None]) -> bool:
+                try:
+                    mismatch = result()
+                except Exception as e:
+                    console.print(f'[red bold]{model}[/] [dim]({tok})[/dim]')
+                    logger.error(e)
+                    return False
+                if mismatch is not None:
+                    console.print(f'[red bold]{model}[/] [dim]({tok}, changed)[/dim]')
+                    console.print(f'\t{mismatch}', highlight=False)
+                    return False
+                console.print(f'[green]{model}[/] [dim]({tok}, unchanged)[/dim]')
+                return True
+
+            failed = run_jobs(check_model, report_check)
+            if failed > 0:
+                logger.error(f'Outputs of {failed} of {len(jobs)} models changed or could not be checked')
+                exit(1)
+            exit(0)
+
+        manifest = load_manifest()
+        output_formats = ['binary', 'text'] if args.text else ['binary']
+
+        def report(tok: str, model: str, result: Callable[[], tuple[list[str], dict[str, str]]]) -> bool:
+            # a model that fails, e.g. because its library is not installed, does not stop the others
+            try:
+                messages, entries = result()
+            except Exception as e:
+                console.print(f'[red bold]{model}[/] [dim]({tok})[/dim]')
+                logger.error(e)
+                return False
+            if len(entries) == 0:
+                console.print(f'[dim]{model} ({tok}, up to date)[/dim]')
+                return True
+            console.print(f'[bold]{model}[/bold] [dim]({tok})[/dim]')
+            for message in messages:
+                logger.info(message)
+            manifest.update(entries)
+            return True
+
+        failed = run_jobs(
+            functools.partial(gen_model, manifest=manifest, force=args.force, output_formats=output_formats), report
         )
-        tekken()
-        builtins.open = open_
+        write_manifest(manifest)
+
+        if args.compare:
+            console.print('[bold]Comparing outputs[/]')
+
+            def report_comparison(
+                name: str,
+                first: str,
+                second: str,
+                data: str,
+                comparison: Comparison,
+                offset: int | None,
+                context: str | None,
+            ) -> None:
+                color = 'green' if comparison.first_line is None else 'yellow'
+                s = (
+                    f'\t[{color}]{name}[/] [dim]{first} vs {second}[/] {data}: '
+                    f'[bold]{comparison.line_agreement * 100:.2f}%[/] [dim]lines[/] '
+                    f'[bold]{comparison.token_agreement * 100:.2f}%[/] [dim]tokens[/]'
+                )
+                if comparison.first_line is not None:
+                    s += f' [dim]first divergence: line {comparison.first_line + 1} token {comparison.first_token}'
+                    if offset is not None:
+                        s += f' char {offset}'
+                    s += '[/]'
+                    if context is not None:
+                        s += f' {context!r}'
+                console.print(s, highlight=False)
+
+            equal, compared = compare_outputs(report_comparison)
+            console.print(f'[bold]{equal}[/] of [bold]{compared}[/] compared outputs are equal')
+        if failed > 0:
+            logger.error(f'Failed to generate outputs for {failed} of {len(jobs)} models')
+            exit(1)
 
     except KeyboardInterrupt:
         print('Interrupted')
@@ -0,0 +1,160 @@
+from .outputs import full_inputs, input_lines, line_inputs, read_tokens
+
+import glob
+import itertools
+import os
+
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+
+import numpy as np
+
+
+class Sequences:
+    # token ids of all lines concatenated, with the start of every line and one past the end
+    tokens: np.ndarray
+    offsets: np.ndarray
+
+    def __init__(self: 'Sequences', tokens: np.ndarray, offsets: np.ndarray) -> None:
+        self.tokens = tokens
+        # signed offsets keep index arithmetic in integers
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @property
+    def lengths(self: 'Sequences') -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def __len__(self: 'Sequences') -> int:
+        return len(self.offsets) - 1
+
+    def line(self: 'Sequences', i: int) -> np.ndarray:
+        return self.tokens[self.offsets[i] : self.offsets[i + 1]]
+
+
+class Comparison:
+    lines: int
+    equal_lines: int
+    tokens: int
+    agreeing_tokens: int
+    # line and token index of the first divergence, or None if all lines are equal
+    first_line: int | None
+    first_token: int | None
+
+    def __init__(
+        self: 'Comparison',
+        lines: int,
+        equal_lines: int,
+        tokens: int,
+        agreeing_tokens: int,
+        first_line: int | None,
+        first_token: int | None,
+    ) -> None:
+        self.lines = lines
+        self.equal_lines = equal_lines
+        self.tokens = tokens
+        self.agreeing_tokens = agreeing_tokens
+        self.first_line = first_line
+        self.first_token = first_token
+
+    @property
+    def line_agreement(self: 'Comparison') -> float:
+        return self.equal_lines / self.lines if self.lines > 0 else 1.0
+
+    @property
+    def token_agreement(self: 'Comparison') -> float:
+        return self.agreeing_tokens / self.tokens if self.tokens > 0 else 1.0
+
+
+def compare(a: Sequences, b: Sequences) -> Comparison:
+    # finds the first differing token of every line at once instead of comparing line by line
+    lines = min(len(a), len(b))
+    lengths_a = a.lengths[:lines]
+    lengths_b = b.lengths[:lines]
+    common = np.minimum(lengths_a, lengths_b)
+    line_of = np.repeat(np.arange(lines), common)
+    position = np.arange(int(common.sum())) - np.repeat(np.cumsum(common) - common, common)
+    differs = a.tokens[a.offsets[:lines][line_of] + position] != b.tokens[b.offsets[:lines][line_of] + position]
+    # lines without a differing token diverge where the shorter one ends, if their lengths differ
+    divergence = np.where(lengths_a != lengths_b, common, -1)
+    mismatched_lines, first = np.unique(line_of[differs], return_index=True)
+    divergence[mismatched_lines] = position[differs][first]
+    longest = np.maximum(lengths_a, lengths_b)
+    agreeing = np.where(divergence >= 0, divergence, longest)
+    diverged = np.flatnonzero(divergence >= 0)
+    return Comparison(
+        lines=max(len(a), len(b)),
+        equal_lines=lines - len(diverged),
+        tokens=int(longest.sum()) + int(a.lengths[lines:].sum()) + int(b.lengths[lines:].sum()),
+        agreeing_tokens=int(agreeing.sum()),
+        first_line=int(diverged[0]) if len(diverged) > 0 else (lines if len(a) != len(b) else None),
+        first_token=int(divergence[diverged[0]]) if len(diverged) > 0 else (0 if len(a) != len(b) else None),
+    )
+
+
+def char_offset(decode: Callable[[Sequence[int]], str] | None, prefix: np.ndarray) -> int | None:
+    # the tokens before the divergence are the same in both outputs, so either decoder maps them to characters
+    if decode is None:
+        return None
+    try:
+        return len(decode([int(token) for token in prefix]))
+    except Exception:
+        return None
+
+
+def output_groups() -> OrderedDict[str, OrderedDict[str, str]]:
+    # libraries with outputs for every model name, in the order of the first library
+    groups: OrderedDict[str, OrderedDict[str, str]] = OrderedDict()
+    for path in sorted(glob.glob('outputs/*/*_tokens_*.*')):
+        tok = os.path.basename(os.path.dirname(path))
+        name = os.path.splitext(os.path.basename(path).split('_tokens_', 1)[1])[0]
+        groups.setdefault(name, OrderedDict())[tok] = os.path.dirname(path)
+    return OrderedDict((name, libraries) for name, libraries in groups.items() if len(libraries) > 1)
+
+
+def reference_decoder(tok: str, name: str) -> Callable[[Sequence[int]], str] | None:
+    from bench.utils.adapter import adapters
+
+    try:
+        adapter = adapters()[tok]()
+        for model in adapter.test_models():
+            if os.path.basename(model).split('.')[0] == name:
+                adapter.load(model)
+                return adapter.decode
+    except Exception:
+        return None
+    return None
+
+
+def compare_outputs(
+    report: Callable[[str, str, str, str, Comparison, int | None, str | None], None],
+) -> tuple[int, int]:
+    # compares the outputs of every pair of libraries with outputs for the same model,
+    # reporting each comparison and returning the number of equal and compared outputs
+    equal = 0
+    compared = 0
+    for name, libraries in output_groups().items():
+        decoders: dict[str, Callable[[Sequence[int]], str] | None] = {}
+        for data in line_inputs + full_inputs:
+            outputs: OrderedDict[str, Sequences] = OrderedDict()
+            for tok in libraries:
+                output = read_tokens(tok, name, data)
+                if output is not None:
+                    outputs[tok] = Sequences(*output)
+            for first, second in itertools.combinations(outputs, 2):
+                expected = outputs[first]
+                comparison = compare(expected, outputs[second])
+                compared += 1
+                offset = None
+                context = None
+                if comparison.first_line is None:
+                    equal += 1
+                elif comparison.first_line < len(expected) and comparison.first_token is not None:
+                    if first not in decoders:
+                        decoders[first] = reference_decoder(first, name)
+                    prefix = expected.line(comparison.first_line)[: comparison.first_token]
+                    offset = char_offset(decoders[first], prefix)
+                    lines = input_lines(data)
+                    if offset is not None and comparison.first_line < len(lines):
+                        context = lines[comparison.first_line][offset : offset + 16]
+                report(name, first, second, data, comparison, offset, context)
+    return equal, compared
@@ -0,0 +1,310 @@
+import functools
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import tempfile
+
+from collections.abc import Callable, Iterator, Sequence
+
+import numpy as np
+
+
+# inputs encoded line by line and as a whole
+line_inputs = ['small', 'mixed']
+full_inputs = ['utf8']
+
+# read once per process, or inherited from the parent process by forked workers
+inputs: dict[str, str] = {}
+
+# cache keys of the outputs of every tokenizer, model and input that are up to date
+MANIFEST = 'outputs/manifest.json'
+
+
+def load_inputs() -> dict[str, str]:
+    if len(inputs) == 0:
+        for data in line_inputs + full_inputs:
+            inputs[data] = open(f'data/{data}_input.txt', encoding='utf-8', newline='\n').read()
+    return inputs
+
+
+def input_lines(data: str) -> list[str]:
+    # the lines encoded by the generator, in the same order as the lines of the token outputs
+    text = load_inputs()[data]
+    if data in full_inputs:
+        return [text.replace('\\n', '\n').replace('\\s', ' ')]
+    lines = [line.rstrip() for line in text.strip('\n').split('\n')]
+    return [line.replace('\\n', '\n').replace('\\s', ' ') for line in lines if len(line) > 0]
+
+
+def init_worker(shared: dict[str, str]) -> None:
+    inputs.update(shared)
+
+
+def write_atomic(path: str, content: str | np.ndarray) -> None:
+    # readers and interrupted runs never see partially written outputs
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        if isinstance(content, np.ndarray):
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, content, allow_pickle=False)
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def load_manifest() -> dict[str, str]:
+    if not os.path.isfile(MANIFEST):
+        return {}
+    try:
+        with open(MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(manifest: dict[str, str]) -> None:
+    write_atomic(MANIFEST, json.dumps(dict(sorted(manifest.items())), indent=2) + '\n')
+
+
+@functools.cache
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    paths = [path]
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(root, file) for root, _, files in os.walk(path) for file in files)
+    for file in paths:
+        digest.update(os.path.relpath(file, path).encode('utf-8'))
+        with open(file, 'rb') as f:
+            for block in iter(functools.partial(f.read, 1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def adapter_hash(tok: str) -> str:
+    from bench.utils.adapter import Adapter, adapters
+
+    # sources of the adapter, the adapters it derives from and the vendored wrappers it imports, which
+    # change outputs without changing the version of any library
+    adapter = adapters()[tok]
+    files = [inspect.getfile(cls) for cls in adapter.__mro__ if issubclass(cls, Adapter)]
+    files += [path for module in adapter.imports if os.path.isfile(path := module.replace('.', '/') + '.py')]
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(file_hash(file).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def cache_key(tok: str, model: str, data: str) -> str:
+    from bench.utils.adapter import adapters
+    from bench.utils.results import library_version
+
+    # models loaded by name are identified by their name and the library version
+    model_file = adapters()[tok]().model_file(model)
+    model_hash = file_hash(model_file) if model_file is not None else model
+    key = [tok, library_version(tok), adapter_hash(tok), model_hash, file_hash(f'data/{data}_input.txt')]
+    return hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+
+
+def token_paths(model: str, name: str, data: str, output_format: str) -> list[str]:
+    # binary outputs are uint32 token ids of all lines with a uint64 index of line boundaries, as .npy files
+    # that can be memory mapped, text outputs are comma separated token ids with one line per input line
+    if output_format == 'binary':
+        return [f'outputs/{model}/{data}_tokens_{name}.npy', f'outputs/{model}/{data}_offsets_{name}.npy']
+    return [f'outputs/{model}/{data}_tokens_{name}.txt']
+
+
+def write_tokens(model: str, name: str, data: str, outputs: list[Sequence[int]], output_formats: Sequence[str]) -> None:
+    if 'binary' in output_formats:
+        tokens_path, offsets_path = token_paths(model, name, data, 'binary')
+        lengths = np.array([len(output) for output in outputs], dtype=np.uint64)
+        tokens = np.fromiter(
+            (token for output in outputs for token in output), dtype=np.uint32, count=int(lengths.sum())
+        )
+        write_atomic(tokens_path, tokens)
+        write_atomic(offsets_path, np.concatenate([np.zeros(1, dtype=np.uint64), np.cumsum(lengths)]))
+    if 'text' in output_formats:
+        lines = [', '.join([str(token) for token in output]) for output in outputs]
+        text = ''.join(f'{line}\n' for line in lines) if data in line_inputs else lines[0]
+        write_atomic(token_paths(model, name, data, 'text')[0], text)
+
+
+def read_tokens(model: str, name: str, data: str) -> tuple[np.ndarray, np.ndarray] | None:
+    # token ids of all lines and the offsets of line boundaries, memory mapped from binary outputs where they exist
+    tokens_path, offsets_path = token_paths(model, name, data, 'binary')
+    if os.path.isfile(tokens_path) and os.path.isfile(offsets_path):
+        return np.load(tokens_path, mmap_mode='r'), np.load(offsets_path, mmap_mode='r')
+    text_path = token_paths(model, name, data, 'text')[0]
+    if not os.path.isfile(text_path):
+        return None
+    text = open(text_path, encoding='utf-8', newline='\n').read()
+    lines = text.split('\n')[:-1] if data in line_inputs else [text]
+    lengths = np.array([line.count(',') + 1 if line.strip() else 0 for line in lines], dtype=np.uint64)
+    tokens = np.fromstring(','.join(line for line in lines if line.strip()), dtype=np.uint32, sep=',')
+    return tokens, np.concatenate([np.zeros(1, dtype=np.uint64), np.cumsum(lengths)])
+
+
+def stored_lines(model: str, name: str, data: str) -> Iterator[np.ndarray] | None:
+    # token ids of every line of the stored outputs, read one line at a time
+    tokens_path, offsets_path = token_paths(model, name, data, 'binary')
+    text_path = token_paths(model, name, data, 'text')[0]
+    if os.path.isfile(tokens_path) and os.path.isfile(offsets_path):
+        tokens = np.load(tokens_path, mmap_mode='r')
+        offsets = np.load(offsets_path, mmap_mode='r')
+        return (tokens[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1))
+    if os.path.isfile(text_path):
+
+        def read_lines() -> Iterator[np.ndarray]:
+            with open(text_path, encoding='utf-8', newline='\n') as f:
+                for line in f:
+                    # lines without tokens would parse as a single 0
+                    if line.strip():
+                        yield np.fromstring(line, dtype=np.uint32, sep=',')
+                    else:
+                        yield np.empty(0, dtype=np.uint32)
+
+        return read_lines()
+    return None
+
+
+def token_diff(data: str, i: int, text: str, expected: np.ndarray, actual: np.ndarray) -> str:
+    common = min(len(expected), len(actual))
+    differs = np.flatnonzero(expected[:common] != actual[:common])
+    first = int(differs[0]) if len(differs) > 0 else common
+    start = max(0, first - 2)
+    return (
+        f'{data} line {i + 1} {text[:40]!r}: token {first} of {len(expected)} differs, '
+        f'expected {[int(token) for token in expected[start : first + 6]]} '
+        f'got {[int(token) for token in actual[start : first + 6]]}'
+    )
+
+
+def check_model(tok: str, model: str) -> str | None:
+    # returns a description of the first output that changed, or None if all outputs are unchanged
+    from bench.utils.adapter import adapters
+
+    name = os.path.basename(model).split('.')[0]
+    adapter = adapters()[tok]()
+    adapter.load(model)
+    for data in line_inputs + full_inputs:
+        stored = stored_lines(tok, name, data)
+        if stored is None:
+            return f'{data}: no stored outputs'
+        texts = input_lines(data)
+        for i, (text, expected) in enumerate(itertools.zip_longest(texts, stored)):
+            if text is None or expected is None:
+                return f'{data}: stored outputs do not have one line for each of the {len(texts)} input lines'
+            actual = np.asarray(adapter.encode_ids(text), dtype=np.int64)
+            if len(actual) != len(expected) or not np.array_equal(actual, expected):
+                return token_diff(data, i, text, expected, actual)
+    return None
+
+
+def gen_lines(
+    model: str,
+    name: str,
+    encode: Callable[[str], Sequence[int]],
+    decode: Callable[[Sequence[int]], str],
+    datasets: Sequence[str] = line_inputs,
+    output_formats: Sequence[str] = ('binary',),
+) -> list[str]:
+    messages = []
+    for data in datasets:
+        text = load_inputs()[data]
+        lines = text.strip('\n').split('\n')
+        outputs = []
+        lines_decoded = []
+        for line_ in lines:
+            line = line_.rstrip()
+            if len(line) == 0:
+                continue
+            line = line.replace('\\n', '\n').replace('\\s', ' ')
+            output = encode(line)
+            outputs.append(output)
+            decoded = decode(output)
+            decoded = decoded.replace('\n', '\\n')
+            trailing_spaces = len(decoded) - len(decoded.rstrip())
+            decoded = decoded.rstrip() + ('\\s' * trailing_spaces)
+            if len(decoded) > 0:
+                lines_decoded.append(decoded)
+            else:
+                lines_decoded.append('\\x')
+        text_decoded = '\n'.join(lines_decoded) + '\n'
+        write_tokens(model, name, data, outputs, output_formats)
+        if len(lines) != len(lines_decoded) or text != text_decoded:
+            messages.append(
+                f'{model}: {name}: {data}_input.txt: {len(lines)} != {len(lines_decoded)} or lines not equal'
+            )
+            if len(lines) < 100:
+                diff_between_text_and_decoded = [
+                    (i, text_line, decoded_line)
+                    for i, (text_line, decoded_line) in enumerate(zip(lines, lines_decoded, strict=False))
+                    if text_line != decoded_line
+                ]
+                if diff_between_text_and_decoded:
+                    messages.append('Differences between text and decoded:')
+                    for i, text_line, decoded_line in diff_between_text_and_decoded:
+                        messages.append(rf'{i}: {text_line!r} != {decoded_line!r}')
+            write_atomic(f'outputs/{model}/{data}_output_{name}.txt', text_decoded)
+    return messages
+
+
+def gen_full(
+    model: str,
+    name: str,
+    encode: Callable[[str], Sequence[int]],
+    decode: Callable[[Sequence[int]], str],
+    datasets: Sequence[str] = full_inputs,
+    output_formats: Sequence[str] = ('binary',),
+) -> list[str]:
+    messages = []
+    for data in datasets:
+        text = load_inputs()[data].replace('\\n', '\n').replace('\\s', ' ')
+        output = encode(text)
+        decoded = decode(output)
+        write_tokens(model, name, data, [output], output_formats)
+        if len(decoded) != len(text) or text != decoded:
+            messages.append(f'{model}: {name}: {data}_input.txt: {len(text)} != {len(decoded)} or text not equal')
+            write_atomic(f'outputs/{model}/{data}_output_{name}.txt', decoded)
+    return messages
+
+
+def gen_model(
+    tok: str,
+    model: str,
+    manifest: dict[str, str],
+    force: bool = False,
+    output_formats: Sequence[str] = ('binary',),
+) -> tuple[list[str], dict[str, str]]:
+    # returns the messages and the updated manifest entries, which are empty when all outputs are up to date
+    from bench.utils.adapter import adapters
+
+    name = os.path.basename(model).split('.')[0]
+    keys = {data: cache_key(tok, model, data) for data in line_inputs + full_inputs}
+    stale = [
+        data
+        for data, key in keys.items()
+        if force
+        or manifest.get(f'{tok}/{name}/{data}') != key
+        or not all(
+            os.path.isfile(path)
+            for output_format in output_formats
+            for path in token_paths(tok, name, data, output_format)
+        )
+    ]
+    if len(stale) == 0:
+        return [], {}
+    adapter = adapters()[tok]()
+    adapter.load(model)
+    line_datasets = [data for data in line_inputs if data in stale]
+    full_datasets = [data for data in full_inputs if data in stale]
+    messages = gen_lines(tok, name, adapter.encode_ids, adapter.decode, line_datasets, output_formats)
+    messages += gen_full(tok, name, adapter.encode_ids, adapter.decode, full_datasets, output_formats)
+    return messages, {f'{tok}/{name}/{data}': keys[data] for data in stale}